@@ -1,3 +1,5 @@
+import glob
+import os
 import typing as T
 from abc import ABCMeta
 from abc import abstractmethod
@@ -9,26 +11,61 @@ from cdk8s import DependencyGraph
 from constructs import Construct
 from stringcase import spinalcase
 
+from fireconfig.autoscaler import AutoscalerBuilder
+from fireconfig.autoscaler import ScalingPolicy
 from fireconfig.container import ContainerBuilder
+from fireconfig.daemonset import DaemonSetBuilder
 from fireconfig.deployment import DeploymentBuilder
 from fireconfig.env import EnvBuilder
+from fireconfig.graph import ObjectGraph
+from fireconfig.job import CronJobBuilder
+from fireconfig.job import JobBuilder
 from fireconfig.namespace import add_missing_namespace
 from fireconfig.output import format_diff
 from fireconfig.output import format_mermaid_graph
-from fireconfig.plan import GLOBAL_CHART_NAME
+from fireconfig.output import paginate_plan
+from fireconfig.ownership import OwnedFields
+from fireconfig.plan import Plan
+from fireconfig.plan import add_config_map_sizes
+from fireconfig.plan import add_rollout_estimates
+from fireconfig.plan import build_plan
 from fireconfig.plan import compute_diff
 from fireconfig.plan import find_deleted_nodes
 from fireconfig.plan import get_resource_changes
 from fireconfig.plan import walk_dep_graph
+from fireconfig.probe import ExecCheck
+from fireconfig.probe import GrpcCheck
+from fireconfig.probe import HttpCheck
+from fireconfig.probe import TcpCheck
+from fireconfig.projected import ProjectedVolumeBuilder
+from fireconfig.statefulset import StatefulSetBuilder
 from fireconfig.subgraph import ChartSubgraph
+from fireconfig.util import GLOBAL_CHART_NAME
 from fireconfig.util import fix_cluster_scoped_objects
 from fireconfig.volume import VolumesBuilder
+from fireconfig.workload import ServicePort
 
 __all__ = [
+    "AutoscalerBuilder",
     "ContainerBuilder",
+    "CronJobBuilder",
+    "DaemonSetBuilder",
     "DeploymentBuilder",
     "EnvBuilder",
+    "ExecCheck",
+    "GrpcCheck",
+    "HttpCheck",
+    "JobBuilder",
+    "ObjectGraph",
+    "OwnedFields",
+    "Plan",
+    "ProjectedVolumeBuilder",
+    "ScalingPolicy",
+    "ServicePort",
+    "StatefulSetBuilder",
+    "TcpCheck",
     "VolumesBuilder",
+    "paginate_plan",
 ]
 
 
@@ -45,25 +82,10 @@ class AppPackage(metaclass=ABCMeta):
     def compile(self, app: Construct): ...
 
 
-def compile(
+def _build_app(
     pkgs: T.Dict[str, T.List[AppPackage]],
-    dag_filename: T.Optional[str] = None,
-    cdk8s_outdir: T.Optional[str] = None,
-    dry_run: bool = False,
-) -> T.Tuple[str, str]:
-    """
-    `compile` takes a list of "packages" and generates Kubernetes manifests from them.  It
-    also generates a Markdown-ified "diff" and a mermaid graph representing the Kubernetes
-    manifest structure and changes.
-
-    :param pkgs: the list of packages to compile
-    :param dag_filename: the location of a previous DAG, for use in generating diffs
-    :param cdk8s_outdir: where to save the generated Kubernetes manifests
-    :param dry_run: actually generate the manifests, or not
-
-    :returns: the mermaid DAG and markdown-ified diff as a tuple of strings
-    """
-
+    cdk8s_outdir: T.Optional[str],
+) -> T.Tuple[App, T.Mapping[str, T.List[str]], T.Mapping[str, ChartSubgraph]]:
     app = App(outdir=cdk8s_outdir)
 
     # Anything that is a "global" dependency (e.g., namespaces) that should be generated before
@@ -101,8 +123,44 @@ def compile(
     # that have "chart" fields, and then from there walk in reverse.  It's somewhat annoying.
     for obj in DependencyGraph(app.node).root.outbound:
         walk_dep_graph(obj, subgraphs)
-    diff, kinds = compute_diff(app)
+
+    return app, subgraph_dag, subgraphs
+
+
+def compile(
+    pkgs: T.Dict[str, T.List[AppPackage]],
+    dag_filename: T.Optional[str] = None,
+    cdk8s_outdir: T.Optional[str] = None,
+    dry_run: bool = False,
+    neighborhood_hops: T.Optional[int] = None,
+    plan_filename: T.Optional[str] = None,
+    owned_fields: T.Optional[OwnedFields] = None,
+    plan_pages_dir: T.Optional[str] = None,
+) -> T.Tuple[str, str]:
+    """
+    `compile` takes a list of "packages" and generates Kubernetes manifests from them.  It
+    also generates a Markdown-ified "diff" and a mermaid graph representing the Kubernetes
+    manifest structure and changes.
+
+    :param pkgs: the list of packages to compile
+    :param dag_filename: the location of a previous DAG, for use in generating diffs
+    :param cdk8s_outdir: where to save the generated Kubernetes manifests
+    :param dry_run: actually generate the manifests, or not
+    :param neighborhood_hops: if set, only draw changed objects and their neighbors up to this many
+        edges away in the DAG, and collapse everything else into one summary node per chart
+    :param plan_filename: if set, also write the structured plan out to this file as JSON
+    :param owned_fields: fields that are managed by some other controller, and should be ignored in the diff
+    :param plan_pages_dir: if set, also split the graph and diff into pages that each fit in a PR comment,
+        and write them to this directory as `page-1.md`, `page-2.md`, etc.
+
+    :returns: the mermaid DAG and markdown-ified diff as a tuple of strings
+    """
+
+    app, subgraph_dag, subgraphs = _build_app(pkgs, cdk8s_outdir)
+    diff, kinds = compute_diff(app, owned_fields)
     resource_changes = get_resource_changes(diff, kinds)
+    add_rollout_estimates(app, resource_changes)
+    add_config_map_sizes(app, resource_changes)
 
     try:
         find_deleted_nodes(subgraphs, resource_changes, dag_filename)
@@ -112,11 +170,62 @@ def compile(
         )
 
     graph_str = format_mermaid_graph(
-        subgraph_dag, subgraphs, dag_filename, resource_changes
+        subgraph_dag, subgraphs, dag_filename, resource_changes, neighborhood_hops
     )
     diff_str = format_diff(resource_changes)
 
+    if plan_filename:
+        plan = build_plan(ObjectGraph.from_subgraphs(subgraph_dag, subgraphs), resource_changes, kinds)
+        with open(plan_filename, "w", encoding="utf-8") as f:
+            f.write(plan.to_json(indent="  "))
+
+    if plan_pages_dir:
+        os.makedirs(plan_pages_dir, exist_ok=True)
+        # clear out pages from a previous (longer) plan so they don't get posted again
+        for old_page in glob.glob(os.path.join(plan_pages_dir, "page-*.md")):
+            os.remove(old_page)
+        for i, page in enumerate(paginate_plan(resource_changes, graph_str)):
+            with open(os.path.join(plan_pages_dir, f"page-{i + 1}.md"), "w", encoding="utf-8") as f:
+                f.write(page)
+
     if not dry_run:
         app.synth()
 
     return graph_str, diff_str
+
+
+def compile_graph(pkgs: T.Dict[str, T.List[AppPackage]]) -> ObjectGraph:
+    """
+    `compile_graph` builds the same dependency graph that `compile` renders as mermaid, but returns it
+    as an `ObjectGraph` that can be queried or exported to JSON, DOT, or GraphML.  No manifests are
+    written out.
+
+    :param pkgs: the list of packages to compile
+
+    :returns: the object dependency graph
+    """
+    _, subgraph_dag, subgraphs = _build_app(pkgs, None)
+    return ObjectGraph.from_subgraphs(subgraph_dag, subgraphs)
+
+
+def compile_plan(
+    pkgs: T.Dict[str, T.List[AppPackage]],
+    cdk8s_outdir: T.Optional[str] = None,
+    owned_fields: T.Optional[OwnedFields] = None,
+) -> Plan:
+    """
+    `compile_plan` computes the same set of changes as `compile`, but returns them as a structured
+    `Plan` object instead of markdown.  No manifests are written out.
+
+    :param pkgs: the list of packages to compile
+    :param cdk8s_outdir: where the previously-generated Kubernetes manifests live
+    :param owned_fields: fields that are managed by some other controller, and should be ignored in the diff
+
+    :returns: the structured plan
+    """
+    app, subgraph_dag, subgraphs = _build_app(pkgs, cdk8s_outdir)
+    diff, kinds = compute_diff(app, owned_fields)
+    resource_changes = get_resource_changes(diff, kinds)
+    add_rollout_estimates(app, resource_changes)
+    add_config_map_sizes(app, resource_changes)
+    return build_plan(ObjectGraph.from_subgraphs(subgraph_dag, subgraphs), resource_changes, kinds)
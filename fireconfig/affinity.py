@@ -0,0 +1,64 @@
+import typing as T
+
+from fireconfig import k8s
+from fireconfig.types import SelectorOperator
+
+
+class Affinity:
+    def __init__(self) -> None:
+        self._node_required: T.List[k8s.NodeSelectorRequirement] = []
+        self._node_preferred: T.List[k8s.PreferredSchedulingTerm] = []
+        self._pod_anti_required: T.List[k8s.PodAffinityTerm] = []
+        self._pod_anti_preferred: T.List[k8s.WeightedPodAffinityTerm] = []
+
+    def add_node_affinity(
+        self,
+        key: str,
+        operator: SelectorOperator,
+        values: T.Optional[T.Sequence[str]],
+        weight: T.Optional[int],
+    ):
+        if operator in {SelectorOperator.Exists, SelectorOperator.DoesNotExist}:
+            if values:
+                raise ValueError(f"node affinity operator {operator} for {key} can't have values")
+        elif not values:
+            raise ValueError(f"node affinity operator {operator} for {key} needs at least one value")
+        elif operator in {SelectorOperator.Gt, SelectorOperator.Lt} and len(values) != 1:
+            raise ValueError(f"node affinity operator {operator} for {key} needs exactly one value")
+
+        req = k8s.NodeSelectorRequirement(key=key, operator=operator, values=values)
+        if weight is None:
+            self._node_required.append(req)
+        else:
+            self._node_preferred.append(
+                k8s.PreferredSchedulingTerm(preference=k8s.NodeSelectorTerm(match_expressions=[req]), weight=weight)
+            )
+
+    def add_pod_anti_affinity(self, topology_key: str, labels: T.Mapping[str, str], weight: T.Optional[int]):
+        term = k8s.PodAffinityTerm(topology_key=topology_key, label_selector=k8s.LabelSelector(match_labels=labels))
+        if weight is None:
+            self._pod_anti_required.append(term)
+        else:
+            self._pod_anti_preferred.append(k8s.WeightedPodAffinityTerm(pod_affinity_term=term, weight=weight))
+
+    def build(self) -> T.Optional[k8s.Affinity]:
+        optional: T.MutableMapping[str, T.Any] = {}
+        if self._node_required or self._node_preferred:
+            optional["node_affinity"] = k8s.NodeAffinity(
+                # All of the required node affinities are ANDed together, just like a node selector
+                required_during_scheduling_ignored_during_execution=k8s.NodeSelector(
+                    node_selector_terms=[k8s.NodeSelectorTerm(match_expressions=self._node_required)]
+                )
+                if self._node_required
+                else None,
+                preferred_during_scheduling_ignored_during_execution=self._node_preferred or None,
+            )
+        if self._pod_anti_required or self._pod_anti_preferred:
+            optional["pod_anti_affinity"] = k8s.PodAntiAffinity(
+                required_during_scheduling_ignored_during_execution=self._pod_anti_required or None,
+                preferred_during_scheduling_ignored_during_execution=self._pod_anti_preferred or None,
+            )
+
+        if not optional:
+            return None
+        return k8s.Affinity(**optional)
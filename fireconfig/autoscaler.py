@@ -0,0 +1,155 @@
+import typing as T
+
+from cdk8s import Chart
+
+from fireconfig import k8s
+from fireconfig.resources import parse_quantity
+from fireconfig.types import ScalingPolicySelect
+from fireconfig.types import ScalingPolicyType
+
+
+class ScalingPolicy(T.NamedTuple):
+    type: ScalingPolicyType
+    value: int
+    period_seconds: int
+
+
+class AutoscalerBuilder:
+    """
+    Configures the HorizontalPodAutoscaler that `DeploymentBuilder` generates when it's given a range
+    of replicas.  If no metrics are configured, Kubernetes defaults to targeting 80% CPU utilization.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: T.List[k8s.MetricSpecV2] = []
+        self._scale_up: T.Optional[k8s.HpaScalingRulesV2] = None
+        self._scale_down: T.Optional[k8s.HpaScalingRulesV2] = None
+
+    def with_cpu_utilization(self, percent: int) -> T.Self:
+        return self._with_resource_utilization("cpu", percent)
+
+    def with_memory_utilization(self, percent: int) -> T.Self:
+        return self._with_resource_utilization("memory", percent)
+
+    def with_custom_metric(
+        self,
+        name: str,
+        average_value: T.Union[int, str],
+        selector: T.Optional[T.Mapping[str, str]] = None,
+    ) -> T.Self:
+        self._metrics.append(
+            k8s.MetricSpecV2(
+                type="Pods",
+                pods=k8s.PodsMetricSourceV2(
+                    metric=_metric_identifier(name, selector),
+                    target=k8s.MetricTargetV2(type="AverageValue", average_value=parse_quantity(average_value)),
+                ),
+            )
+        )
+        return self
+
+    def with_external_metric(
+        self,
+        name: str,
+        *,
+        value: T.Optional[T.Union[int, str]] = None,
+        average_value: T.Optional[T.Union[int, str]] = None,
+        selector: T.Optional[T.Mapping[str, str]] = None,
+    ) -> T.Self:
+        if (value is None) == (average_value is None):
+            raise ValueError("exactly one of value or average_value must be set for an external metric")
+
+        if value is not None:
+            target = k8s.MetricTargetV2(type="Value", value=parse_quantity(value))
+        else:
+            assert average_value is not None
+            target = k8s.MetricTargetV2(type="AverageValue", average_value=parse_quantity(average_value))
+
+        self._metrics.append(
+            k8s.MetricSpecV2(
+                type="External",
+                external=k8s.ExternalMetricSourceV2(metric=_metric_identifier(name, selector), target=target),
+            )
+        )
+        return self
+
+    def with_scale_up_behavior(
+        self,
+        *policies: ScalingPolicy,
+        stabilization_window_seconds: T.Optional[int] = None,
+        select_policy: T.Optional[ScalingPolicySelect] = None,
+    ) -> T.Self:
+        self._scale_up = _scaling_rules(policies, stabilization_window_seconds, select_policy)
+        return self
+
+    def with_scale_down_behavior(
+        self,
+        *policies: ScalingPolicy,
+        stabilization_window_seconds: T.Optional[int] = None,
+        select_policy: T.Optional[ScalingPolicySelect] = None,
+    ) -> T.Self:
+        self._scale_down = _scaling_rules(policies, stabilization_window_seconds, select_policy)
+        return self
+
+    def build(
+        self,
+        chart: Chart,
+        id: str,
+        target: k8s.KubeDeployment,
+        min_replicas: int,
+        max_replicas: int,
+    ) -> k8s.KubeHorizontalPodAutoscalerV2:
+        optional: T.MutableMapping[str, T.Any] = {}
+        if self._metrics:
+            optional["metrics"] = self._metrics
+        if self._scale_up is not None or self._scale_down is not None:
+            optional["behavior"] = k8s.HorizontalPodAutoscalerBehaviorV2(
+                scale_up=self._scale_up,
+                scale_down=self._scale_down,
+            )
+
+        return k8s.KubeHorizontalPodAutoscalerV2(
+            chart,
+            id,
+            spec=k8s.HorizontalPodAutoscalerSpecV2(
+                scale_target_ref=k8s.CrossVersionObjectReferenceV2(
+                    api_version=target.api_version,
+                    kind=target.kind,
+                    name=target.name,
+                ),
+                min_replicas=min_replicas,
+                max_replicas=max_replicas,
+                **optional,
+            ),
+        )
+
+    def _with_resource_utilization(self, resource: str, percent: int) -> T.Self:
+        self._metrics.append(
+            k8s.MetricSpecV2(
+                type="Resource",
+                resource=k8s.ResourceMetricSourceV2(
+                    name=resource,
+                    target=k8s.MetricTargetV2(type="Utilization", average_utilization=percent),
+                ),
+            )
+        )
+        return self
+
+
+def _metric_identifier(name: str, selector: T.Optional[T.Mapping[str, str]]) -> k8s.MetricIdentifierV2:
+    if selector is None:
+        return k8s.MetricIdentifierV2(name=name)
+    return k8s.MetricIdentifierV2(name=name, selector=k8s.LabelSelector(match_labels=selector))
+
+
+def _scaling_rules(
+    policies: T.Sequence[ScalingPolicy],
+    stabilization_window_seconds: T.Optional[int],
+    select_policy: T.Optional[ScalingPolicySelect],
+) -> k8s.HpaScalingRulesV2:
+    return k8s.HpaScalingRulesV2(
+        policies=[k8s.HpaScalingPolicyV2(type=p.type, value=p.value, period_seconds=p.period_seconds) for p in policies]
+        or None,
+        select_policy=select_policy,
+        stabilization_window_seconds=stabilization_window_seconds,
+    )
@@ -0,0 +1,121 @@
+import base64
+import gzip
+import hashlib
+import re
+import typing as T
+
+from fireconfig.types import Compression
+
+# The apiserver rejects ConfigMaps whose data (plus binaryData) adds up to more than this
+MAX_CONFIG_MAP_BYTES = 1024 * 1024
+
+# Text values go in `data` and bytes values go in `binaryData`
+ConfigMapData = T.Mapping[str, T.Union[str, bytes]]
+
+_BINARY_SUMMARY_RE = re.compile(r"^<binary data: (\d+) bytes, sha256 ([0-9a-f]+)>$")
+_BINARY_SUMMARY_HASH_LENGTH = 12
+
+
+def _value_size(v: T.Union[str, bytes]) -> int:
+    return len(v) if isinstance(v, bytes) else len(v.encode("utf-8"))
+
+
+def data_size(data: ConfigMapData) -> int:
+    return sum(_value_size(v) for v in data.values())
+
+
+def config_map_size(cm_json: T.Mapping[str, T.Any]) -> int:
+    """The size of a ConfigMap manifest's payload, computed the same way that the apiserver validates it"""
+    binary_size = sum(len(base64.b64decode(v)) for v in cm_json.get("binaryData", {}).values())
+    return data_size(cm_json.get("data", {})) + binary_size
+
+
+def config_map_payload(data: ConfigMapData) -> T.Mapping[str, T.Any]:
+    """Split `data` up into the `data` and `binary_data` arguments for `KubeConfigMap`"""
+    payload: T.MutableMapping[str, T.Any] = {}
+    text = {k: v for k, v in data.items() if isinstance(v, str)}
+    binary = {k: base64.b64encode(v).decode("ascii") for k, v in data.items() if isinstance(v, bytes)}
+    if text:
+        payload["data"] = text
+    if binary:
+        payload["binary_data"] = binary
+    return payload
+
+
+def hashable_data(data: ConfigMapData) -> T.List[T.Tuple[str, str, str]]:
+    # Tag each entry with the field it ends up in, so that a text value doesn't hash the same as the bytes
+    # that it happens to be the base64 encoding of
+    return sorted(
+        ("data", k, v) if isinstance(v, str) else ("binaryData", k, base64.b64encode(v).decode("ascii"))
+        for k, v in data.items()
+    )
+
+
+def compress(key: str, value: bytes, compression: Compression) -> T.Tuple[str, bytes]:
+    """
+    Compress `value` and add the matching file extension to `key`; the compressed file is mounted under the
+    new name (e.g., `model.bin.gz`), and it's up to the consumer to decompress it.  The output is
+    deterministic, so that content hashes (and diffs) don't change unless the data does.
+    """
+    if compression == Compression.Uncompressed:
+        return key, value
+    if compression == Compression.Gzip:
+        return f"{key}.{compression}", gzip.compress(value, mtime=0)
+
+    try:
+        import zstandard  # type: ignore  # noqa: PLC0415
+    except ImportError as e:
+        raise ImportError("zstd compression requires the `zstandard` package (fireconfig[zstd])") from e
+    return f"{key}.{compression}", zstandard.ZstdCompressor().compress(value)
+
+
+def summarize_binary_data(cm_json: T.MutableMapping[str, T.Any]):
+    """
+    Replace every `binaryData` blob in a ConfigMap manifest with its size and hash, so that diffs of binary
+    data are readable (and don't blow up the size of the plan)
+    """
+    for k, v in cm_json.get("binaryData", {}).items():
+        raw = base64.b64decode(v)
+        digest = hashlib.sha256(raw).hexdigest()[:_BINARY_SUMMARY_HASH_LENGTH]
+        cm_json["binaryData"][k] = f"<binary data: {len(raw)} bytes, sha256 {digest}>"
+
+
+def binary_size_delta(old: T.Any, new: T.Any) -> T.Optional[int]:
+    if not isinstance(old, str) or not isinstance(new, str):
+        return None
+    old_match, new_match = _BINARY_SUMMARY_RE.match(old), _BINARY_SUMMARY_RE.match(new)
+    if old_match is None or new_match is None:
+        return None
+    return int(new_match.group(1)) - int(old_match.group(1))
+
+
+def shard_data(data: ConfigMapData, max_bytes: int = MAX_CONFIG_MAP_BYTES) -> T.List[ConfigMapData]:
+    """
+    Split `data` up into as few shards as we can manage, each of which is at most `max_bytes`; keys
+    are packed first-fit, largest first, and each shard keeps the keys in their original order.  If
+    everything fits, the result is just `[data]`.
+    """
+    if data_size(data) <= max_bytes:
+        return [data]
+
+    sizes = {k: _value_size(v) for k, v in data.items()}
+    shards: T.List[T.Tuple[int, T.Set[str]]] = []
+    for k in sorted(data, key=lambda k: (-sizes[k], k)):
+        if sizes[k] > max_bytes:
+            raise ValueError(f"ConfigMap entry {k} is {sizes[k]} bytes, which is larger than the {max_bytes} limit")
+        for i, (used, keys) in enumerate(shards):
+            if used + sizes[k] <= max_bytes:
+                keys.add(k)
+                shards[i] = (used + sizes[k], keys)
+                break
+        else:
+            shards.append((sizes[k], {k}))
+
+    return [{k: v for k, v in data.items() if k in keys} for _, keys in shards]
+
+
+def format_bytes(n: int) -> str:
+    for suffix, scale in (("MiB", 1024 * 1024), ("KiB", 1024)):
+        if n >= scale:
+            return f"{n / scale:.1f}{suffix}"
+    return f"{n}B"
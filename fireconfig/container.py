@@ -1,14 +1,30 @@
 import typing as T
 
+from cdk8s import ApiObject
 from cdk8s import Chart
 
 from fireconfig import k8s
 from fireconfig.env import EnvBuilder
+from fireconfig.env import resource_field_ref
+from fireconfig.probe import LIVENESS_DEFAULTS
+from fireconfig.probe import READINESS_DEFAULTS
+from fireconfig.probe import STARTUP_DEFAULTS
+from fireconfig.probe import ProbeCheck
+from fireconfig.probe import ProbeTimings
+from fireconfig.probe import build_probe
 from fireconfig.resources import Resources
+from fireconfig.resources import parse_quantity
 from fireconfig.types import Capability
+from fireconfig.types import HugePageSize
+from fireconfig.types import QoSClass
+from fireconfig.types import ResourceField
+from fireconfig.types import ResourceProfile
 from fireconfig.volume import VolumeDefsWithObject
 from fireconfig.volume import VolumesBuilder
 
+# Runtime env vars that hold a space-separated list of flags, which we can add to instead of replacing
+_APPENDABLE_RUNTIME_ENV = {"JAVA_TOOL_OPTIONS"}
+
 
 class ContainerBuilder:
     def __init__(
@@ -21,11 +37,16 @@ class ContainerBuilder:
         self._command = command
         self._env: T.Optional[EnvBuilder] = None
         self._env_names: T.Optional[T.Sequence[str]] = None
+        self._env_config_map: T.Optional[k8s.KubeConfigMap] = None
+        self._runtime_env: T.MutableMapping[str, T.Tuple[str, T.Mapping[str, T.Any]]] = {}
         self._resources: T.Optional[Resources] = None
+        self._hugepages: T.MutableMapping[str, T.Union[int, str]] = {}
         self._ports: T.Sequence[int] = []
         self._volumes: T.Optional[VolumesBuilder] = None
         self._volume_names: T.Optional[T.Sequence[str]] = None
+        self._uncharged_volumes: T.Set[str] = set()
         self._capabilities: T.Set[Capability] = set()
+        self._probes: T.MutableMapping[str, T.Tuple[T.Optional[ProbeCheck], ProbeTimings, ProbeTimings]] = {}
 
     @property
     def ports(self) -> T.Sequence[int]:
@@ -36,19 +57,110 @@ class ContainerBuilder:
         self._env_names = names
         return self
 
+    @property
+    def qos_class(self) -> QoSClass:
+        """The QoS class this container contributes to its pod (a pod is only Guaranteed if all its containers are)"""
+        resources = self._effective_resources()
+        if resources is None:
+            return QoSClass.BestEffort
+        return resources.qos_class
+
     def with_resources(
         self,
         *,
         requests: T.Optional[T.Mapping[str, T.Any]] = None,
         limits: T.Optional[T.Mapping[str, T.Any]] = None,
+        profile: T.Optional[ResourceProfile] = None,
+        cpu: T.Optional[T.Union[int, str]] = None,
+        memory: T.Optional[T.Union[int, str]] = None,
     ) -> T.Self:
-        self._resources = Resources(requests, limits)
+        if profile is not None:
+            if requests is not None or limits is not None:
+                raise ValueError("cannot set requests or limits when using a resource profile")
+            self._resources = Resources.from_profile(ResourceProfile(profile), cpu, memory)
+        else:
+            if cpu is not None or memory is not None:
+                raise ValueError("cpu and memory can only be set with a resource profile; use requests or limits")
+            self._resources = Resources(requests, limits)
+        return self
+
+    def with_gomaxprocs(self) -> T.Self:
+        """
+        Set GOMAXPROCS to the container's CPU limit (rounded up to whole cores), so the Go runtime doesn't
+        size itself to all of the node's cores; this requires a CPU limit.
+        """
+        self._runtime_env["GOMAXPROCS"] = ("cpu", {"valueFrom": resource_field_ref(ResourceField.LIMITS_CPU, "1")})
+        return self
+
+    def with_jvm_heap_percentage(self, percent: float) -> T.Self:
+        """Size the JVM heap as a percentage of the container's memory limit; this requires a memory limit"""
+        self._runtime_env["JAVA_TOOL_OPTIONS"] = ("memory", {"value": f"-XX:MaxRAMPercentage={float(percent)}"})
+        return self
+
+    def with_worker_pool_env(self, name: str, workers_per_cpu: int = 1) -> T.Self:
+        """
+        Set the env var `name` to `workers_per_cpu` times the container's CPU limit (rounded up to whole
+        cores), for runtimes that size their thread or worker pools from an env var; this requires a CPU limit.
+        """
+        if workers_per_cpu < 1 or 1000 % workers_per_cpu != 0:
+            raise ValueError(f"workers_per_cpu must evenly divide 1000, got {workers_per_cpu}")
+        divisor = "1" if workers_per_cpu == 1 else f"{1000 // workers_per_cpu}m"
+        self._runtime_env[name] = ("cpu", {"valueFrom": resource_field_ref(ResourceField.LIMITS_CPU, divisor)})
+        return self
+
+    def with_hugepages(self, page_size: HugePageSize, amount: T.Union[int, str]) -> T.Self:
+        """Request `amount` of hugepages of the given size (Kubernetes requires requests == limits for these)"""
+        self._hugepages[f"hugepages-{page_size}"] = amount
         return self
 
     def with_ports(self, *ports: int) -> T.Self:
         self._ports = ports
         return self
 
+    def with_readiness_probe(
+        self,
+        check: T.Optional[ProbeCheck] = None,
+        *,
+        initial_delay_seconds: T.Optional[int] = None,
+        period_seconds: T.Optional[int] = None,
+        timeout_seconds: T.Optional[int] = None,
+        success_threshold: T.Optional[int] = None,
+        failure_threshold: T.Optional[int] = None,
+    ) -> T.Self:
+        timings = ProbeTimings(
+            initial_delay_seconds, period_seconds, timeout_seconds, success_threshold, failure_threshold
+        )
+        self._probes["readiness_probe"] = (check, timings, READINESS_DEFAULTS)
+        return self
+
+    def with_liveness_probe(
+        self,
+        check: T.Optional[ProbeCheck] = None,
+        *,
+        initial_delay_seconds: T.Optional[int] = None,
+        period_seconds: T.Optional[int] = None,
+        timeout_seconds: T.Optional[int] = None,
+        failure_threshold: T.Optional[int] = None,
+    ) -> T.Self:
+        # Kubernetes requires the success threshold for liveness probes to be 1
+        timings = ProbeTimings(initial_delay_seconds, period_seconds, timeout_seconds, None, failure_threshold)
+        self._probes["liveness_probe"] = (check, timings, LIVENESS_DEFAULTS)
+        return self
+
+    def with_startup_probe(
+        self,
+        check: T.Optional[ProbeCheck] = None,
+        *,
+        initial_delay_seconds: T.Optional[int] = None,
+        period_seconds: T.Optional[int] = None,
+        timeout_seconds: T.Optional[int] = None,
+        failure_threshold: T.Optional[int] = None,
+    ) -> T.Self:
+        # Kubernetes requires the success threshold for startup probes to be 1
+        timings = ProbeTimings(initial_delay_seconds, period_seconds, timeout_seconds, None, failure_threshold)
+        self._probes["startup_probe"] = (check, timings, STARTUP_DEFAULTS)
+        return self
+
     def with_security_context(self, capability: Capability) -> T.Self:
         self._capabilities.add(capability)
         return self
@@ -58,6 +170,17 @@ class ContainerBuilder:
         self._volume_names = names
         return self
 
+    def memory_backed_volumes(self) -> T.Set[str]:
+        """The memory-backed volumes that this container mounts"""
+        return self._volumes.memory_backed_volumes(self._volume_names) if self._volumes else set()
+
+    def set_uncharged_volumes(self, names: T.Iterable[str]):
+        """
+        Don't add the size of these memory-backed volumes to this container's memory; the workload uses
+        this so that a volume shared by several containers is only counted once per pod.
+        """
+        self._uncharged_volumes = set(names)
+
     def build(self) -> k8s.Container:
         optional: T.MutableMapping[str, T.Any] = {}
         if self._command:
@@ -65,22 +188,22 @@ class ContainerBuilder:
         if self._args:
             optional["args"] = self._args
 
-        optional["env"] = []
-        if self._env:
-            if env := self._env.build(self._env_names):
-                optional["env"] = env
-            if env_from := self._env.build_from():
-                optional["env_from"] = env_from
+        optional.update(self._build_env())
         if self._ports:
             optional["ports"] = [k8s.ContainerPort(container_port=p) for p in self._ports]
-        if self._resources is not None:
-            optional["resources"] = {}
-            if self._resources.limits is not None:
-                optional["resources"]["limits"] = self._resources.limits
-            if self._resources.requests is not None:
-                optional["resources"]["requests"] = self._resources.requests
+        resources = self._effective_resources()
+        if resources is not None or self._hugepages:
+            optional["resources"] = self._build_resources(resources)
         if self._volumes:
+            for page_size in self._volumes.hugepage_sizes(self._volume_names):
+                if f"hugepages-{page_size}" not in self._hugepages:
+                    raise ValueError(
+                        f"container {self._name} mounts a {page_size} hugepages volume without requesting "
+                        f"{page_size} hugepages; use with_hugepages"
+                    )
             optional["volume_mounts"] = self._volumes.build_mounts(self._volume_names)
+        for probe_type, (check, timings, defaults) in self._probes.items():
+            optional[probe_type] = build_probe(check, timings, defaults, self._ports)
         if self._capabilities:
             optional["security_context"] = {"capabilities": {"add": [c for c in self._capabilities]}}
 
@@ -90,6 +213,75 @@ class ContainerBuilder:
             **optional,
         )
 
+    def _build_env(self) -> T.Mapping[str, T.Any]:
+        env: T.MutableMapping[str, T.Any] = {"env": []}
+        if self._env:
+            env["env"] = list(self._env.build(self._env_names, self._env_config_map))
+            if env_from := self._env.build_from(self._env_config_map):
+                env["env_from"] = env_from
+        if self._runtime_env:
+            runtime_env = self._build_runtime_env()
+            runtime_names = {e["name"] for e in runtime_env}
+            env["env"] = [e for e in env["env"] if e["name"] not in runtime_names] + list(runtime_env)
+        return env
+
+    def _build_runtime_env(self) -> T.Sequence[T.Mapping[str, T.Any]]:
+        # Without a limit the downward API (and the runtime) falls back to the node's capacity, which is
+        # exactly what these env vars are supposed to prevent
+        limits = (self._resources.limits if self._resources is not None else None) or {}
+        env = []
+        for name, (resource, entry) in self._runtime_env.items():
+            if resource not in limits:
+                raise ValueError(f"container {self._name} needs a {resource} limit to set {name}")
+            env.append({"name": name, **self._merge_user_env(name, entry)})
+        return env
+
+    def _merge_user_env(self, name: str, entry: T.Mapping[str, T.Any]) -> T.Mapping[str, T.Any]:
+        # A second entry with the same name would silently override the user's, so flag lists (like
+        # JAVA_TOOL_OPTIONS) get our flag appended to them, and anything else is an error
+        user = self._env.get(name) if self._env is not None and name in (self._env_names or [name]) else None
+        if user is None:
+            return entry
+        if name in _APPENDABLE_RUNTIME_ENV and user[0] == "value" and "value" in entry:
+            return {"value": f"{user[1]} {entry['value']}"}
+        raise ValueError(f"container {self._name} already sets {name} in its env")
+
+    def _effective_resources(self) -> T.Optional[Resources]:
+        # memory-backed volumes are charged against the container's memory, so account for them here
+        charged = self.memory_backed_volumes() - self._uncharged_volumes
+        if self._volumes and (memory_backed := self._volumes.memory_backed_size(charged)):
+            return (self._resources or Resources(None, None)).with_extra_memory(memory_backed)
+        return self._resources
+
+    def _build_resources(self, base: T.Optional[Resources]) -> T.Mapping[str, T.Any]:
+        resources: T.MutableMapping[str, T.Any] = {}
+        limits = dict(base.limits or {}) if base is not None else {}
+        requests = dict(base.requests or {}) if base is not None else {}
+
+        for k, v in self._hugepages.items():
+            limits[k] = requests[k] = parse_quantity(v)
+
+        if limits:
+            resources["limits"] = limits
+        if requests:
+            resources["requests"] = requests
+        return resources
+
+    def build_env_config_map(self, chart: Chart) -> T.Sequence[ApiObject]:
+        """
+        Create the ConfigMap for any env values that should come in through `envFrom` (see
+        `EnvBuilder.as_config_map`); this needs to be called before `build`.
+        """
+        if self._env is None:
+            return []
+        self._env_config_map = self._env.build_config_map(chart, self._env_names)
+        return [self._env_config_map] if self._env_config_map is not None else []
+
+    def build_claim_templates(self) -> T.Sequence[k8s.KubePersistentVolumeClaimProps]:
+        if self._volumes is None:
+            return []
+        return self._volumes.build_claim_templates(self._volume_names)
+
     def build_volumes(self, chart: Chart) -> VolumeDefsWithObject:
         if self._volumes is None:
             return dict()
@@ -0,0 +1,70 @@
+import typing as T
+
+from cdk8s import Chart
+
+from fireconfig import k8s
+from fireconfig.util import int_or_string
+from fireconfig.workload import WorkloadBuilder
+
+
+class DaemonSetBuilder(WorkloadBuilder):
+    """
+    Builds a DaemonSet, for node agents (log shippers, metrics collectors, etc.) that need to run on
+    every node; these usually need tolerations and host-path volumes (see `VolumesBuilder.with_host_path`).
+    """
+
+    def __init__(self, *, app_label: str, tag: T.Optional[str] = None):
+        super().__init__(app_label=app_label, tag=tag)
+
+        self._max_surge: T.Optional[T.Union[int, str]] = None
+        self._max_unavailable: T.Optional[T.Union[int, str]] = None
+        self._min_ready_seconds: T.Optional[int] = None
+
+    def with_rolling_update(
+        self,
+        *,
+        max_surge: T.Union[int, str] = 1,
+        max_unavailable: T.Union[int, str] = 0,
+        min_ready_seconds: T.Optional[int] = None,
+    ) -> T.Self:
+        """
+        By default, start the new pod on a node (and wait for it to be ready) before stopping the old one,
+        so the node is never without its agent during a rollout.  Surging requires the agent to tolerate two
+        copies running at once (e.g., no exclusive host ports).
+        """
+        if max_surge in {0, "0%"} and max_unavailable in {0, "0%"}:
+            raise ValueError("max_surge and max_unavailable can't both be zero")
+        self._max_surge = max_surge
+        self._max_unavailable = max_unavailable
+        self._min_ready_seconds = min_ready_seconds
+        return self
+
+    def _build(self, meta: k8s.ObjectMeta, chart: Chart) -> k8s.KubeDaemonSet:
+        if self._build_claim_templates():
+            raise ValueError(f"daemonset {self._app_label} can't mount persistent claims; use a StatefulSetBuilder")
+
+        optional: T.MutableMapping[str, T.Any] = {}
+        if self._max_surge is not None and self._max_unavailable is not None:
+            optional["update_strategy"] = k8s.DaemonSetUpdateStrategy(
+                type="RollingUpdate",
+                rolling_update=k8s.RollingUpdateDaemonSet(
+                    max_surge=int_or_string(self._max_surge),
+                    max_unavailable=int_or_string(self._max_unavailable),
+                ),
+            )
+        if self._min_ready_seconds is not None:
+            optional["min_ready_seconds"] = self._min_ready_seconds
+
+        ds = k8s.KubeDaemonSet(
+            chart,
+            f"{self._tag}ds",
+            metadata=meta,
+            spec=k8s.DaemonSetSpec(
+                selector=k8s.LabelSelector(match_labels=self._selector),
+                template=self._build_pod_template(chart),
+                **optional,
+            ),
+        )
+
+        self._add_pod_owner_env(ds)
+        return ds
@@ -1,42 +1,27 @@
 import typing as T
 
 from cdk8s import Chart
-from cdk8s import JsonPatch
 
 from fireconfig import k8s
-from fireconfig.container import ContainerBuilder
-from fireconfig.object import ObjectBuilder
-from fireconfig.types import TaintEffect
-from fireconfig.volume import VolumeDefsWithObject
-from fireconfig.volume import VolumesBuilder
+from fireconfig.autoscaler import AutoscalerBuilder
+from fireconfig.rollout import DEFAULT_ROLLOUT
+from fireconfig.rollout import ROLLOUT_PRESETS
+from fireconfig.rollout import Rollout
+from fireconfig.types import RolloutPreset
+from fireconfig.util import int_or_string
+from fireconfig.workload import WorkloadBuilder
 
-_APP_LABEL_KEY = "app.kubernetes.io/name"
 
-
-class DeploymentBuilder(ObjectBuilder):
+class DeploymentBuilder(WorkloadBuilder):
     def __init__(self, *, app_label: str, tag: T.Optional[str] = None):
-        self._selector = {_APP_LABEL_KEY: app_label}
-        super().__init__(labels=self._selector)
+        super().__init__(app_label=app_label, tag=tag)
 
         self._replicas: T.Union[int, T.Tuple[int, int]] = 1
-        self._app_label = app_label
-        self._tag = "" if tag is None else f"{tag}-"
-
-        self._pod_annotations: T.MutableMapping[str, str] = {}
-        self._pod_labels: T.MutableMapping[str, str] = dict(self._selector)
-        self._containers: T.List[ContainerBuilder] = []
-        self._node_selector: T.Optional[T.Mapping[str, str]] = None
-        self._service_account_role: T.Optional[str] = None
-        self._service_account_role_is_cluster_role: bool = False
-        self._service: bool = False
-        self._service_name: str = f"{self._app_label}-svc"
-        self._service_ports: T.Optional[T.List[int]] = None
-        self._tolerations: T.List[T.Tuple[str, str, TaintEffect]] = []
-        self._volumes: T.Optional[VolumesBuilder] = None
-
-    @property
-    def service_name(self) -> str:
-        return self._service_name
+        self._autoscaler: T.Optional[AutoscalerBuilder] = None
+        self._rollout: T.Optional[Rollout] = None
+        self._pdb: bool = False
+        self._pdb_min_available: T.Optional[T.Union[int, str]] = None
+        self._pdb_max_unavailable: T.Optional[T.Union[int, str]] = None
 
     def with_replicas(self, min_replicas: int, max_replicas: T.Optional[int] = None) -> T.Self:
         if max_replicas is not None:
@@ -47,84 +32,69 @@ class DeploymentBuilder(ObjectBuilder):
             self._replicas = min_replicas
         return self
 
-    def with_pod_annotation(self, key: str, value: str) -> T.Self:
-        self._pod_annotations[key] = value
-        return self
-
-    def with_pod_label(self, key: str, value: str) -> T.Self:
-        self._pod_labels[key] = value
-        return self
-
-    def with_containers(self, *containers: ContainerBuilder) -> T.Self:
-        self._containers.extend(containers)
-        return self
-
-    def with_node_selector(self, key: str, value: str) -> T.Self:
-        self._node_selector = {key: value}
-        return self
-
-    def with_service(self, ports: T.Optional[T.List[int]] = None) -> T.Self:
-        self._service = True
-        self._service_ports = ports
+    def with_autoscaler(self, autoscaler: AutoscalerBuilder) -> T.Self:
+        self._autoscaler = autoscaler
         return self
 
-    def with_service_account_and_role_binding(self, role_name: str, is_cluster_role: bool = False) -> T.Self:
-        self._service_account_role = role_name
-        self._service_account_role_is_cluster_role = is_cluster_role
+    def with_rollout(
+        self,
+        preset: T.Optional[RolloutPreset] = None,
+        *,
+        max_surge: T.Optional[T.Union[int, str]] = None,
+        max_unavailable: T.Optional[T.Union[int, str]] = None,
+        min_ready_seconds: T.Optional[int] = None,
+        progress_deadline_seconds: T.Optional[int] = None,
+        revision_history_limit: T.Optional[int] = None,
+    ) -> T.Self:
+        """
+        Configure the rolling update strategy for the deployment, starting from one of the presets in
+        `ROLLOUT_PRESETS` (or the Kubernetes defaults, if no preset is given); any of the individual
+        settings can be overridden.
+        """
+        rollout = ROLLOUT_PRESETS[preset] if preset is not None else DEFAULT_ROLLOUT
+        overrides: T.Mapping[str, T.Any] = {
+            "max_surge": max_surge,
+            "max_unavailable": max_unavailable,
+            "min_ready_seconds": min_ready_seconds,
+            "progress_deadline_seconds": progress_deadline_seconds,
+            "revision_history_limit": revision_history_limit,
+        }
+        self._rollout = rollout._replace(**{k: v for k, v in overrides.items() if v is not None})
         return self
 
-    def with_toleration(self, key: str, value: str = "", effect: TaintEffect = TaintEffect.NoExecute) -> T.Self:
-        self._tolerations.append((key, value, effect))
+    def with_pod_disruption_budget(
+        self,
+        *,
+        min_available: T.Optional[T.Union[int, str]] = None,
+        max_unavailable: T.Optional[T.Union[int, str]] = None,
+    ) -> T.Self:
+        """
+        Protect the deployment with a PodDisruptionBudget.  If neither `min_available` nor `max_unavailable`
+        is given, a quarter of the replicas (but at least one) are allowed to be unavailable at once; if the
+        replicas are managed by an HPA, this is a percentage so that it scales with the current replica count.
+        Values can be numbers or percentages.
+        """
+        if min_available is not None and max_unavailable is not None:
+            raise ValueError("only one of min_available or max_unavailable can be set")
+        self._pdb = True
+        self._pdb_min_available = min_available
+        self._pdb_max_unavailable = max_unavailable
         return self
 
-    def _build(self, meta: k8s.ObjectMeta, chart: Chart) -> k8s.KubeDeployment:  # noqa: PLR0912
-        pod_meta: T.MutableMapping[str, T.Any] = {}
-        if self._pod_annotations:
-            pod_meta["annotations"] = self._pod_annotations
-        pod_meta["labels"] = self._pod_labels
-
+    def _build(self, meta: k8s.ObjectMeta, chart: Chart) -> k8s.KubeDeployment:
+        # If there's a range of replicas, the HPA owns the replica count, so we leave it out of the
+        # deployment spec entirely; otherwise every apply would reset it
+        replica_range: T.Optional[T.Tuple[int, int]] = None
         if type(self._replicas) is tuple:
             replicas: T.Optional[int] = None
-            raise NotImplementedError("No support for HPA currently")
+            replica_range = self._replicas
         else:
+            if self._autoscaler is not None:
+                raise ValueError("an autoscaler requires a range of replicas; use with_replicas(min, max)")
             replicas = self._replicas  # type: ignore
 
-        optional: T.MutableMapping[str, T.Any] = {}
-        if self._node_selector is not None:
-            optional["node_selector"] = self._node_selector
-
-        if self._service_account_role is not None:
-            sa = self._build_service_account(chart)
-            rb = self._build_role_binding_for_service_account(
-                chart,
-                sa,
-                self._service_account_role,
-                self._service_account_role_is_cluster_role,
-            )
-            self._deps.append(sa)
-            self._deps.append(rb)
-            optional["service_account_name"] = sa.name
-
-        if self._service:
-            if self._service_ports is None:
-                self._service_ports = []
-                for c in self._containers:
-                    self._service_ports.extend(c.ports)
-            self._build_service(chart)
-
-        if len(self._tolerations) > 0:
-            optional["tolerations"] = [{"key": t[0], "value": t[1], "effect": t[2]} for t in self._tolerations]
-
-        vols: VolumeDefsWithObject = dict()
-        for c in self._containers:
-            vols = {**vols, **c.build_volumes(chart)}
-
-        if vols:
-            optional["volumes"] = []
-            for defn, obj in vols.values():
-                optional["volumes"].append(defn)
-                if obj is not None:
-                    self._deps.append(obj)
+        if self._build_claim_templates():
+            raise ValueError(f"deployment {self._app_label} can't mount persistent claims; use a StatefulSetBuilder")
 
         depl = k8s.KubeDeployment(
             chart,
@@ -133,65 +103,40 @@ class DeploymentBuilder(ObjectBuilder):
             spec=k8s.DeploymentSpec(
                 selector=k8s.LabelSelector(match_labels=self._selector),
                 replicas=replicas,
-                template=k8s.PodTemplateSpec(
-                    metadata=k8s.ObjectMeta(**pod_meta),
-                    spec=k8s.PodSpec(
-                        containers=[c.build() for c in self._containers],
-                        **optional,
-                    ),
-                ),
+                **(self._rollout.build_spec_fields() if self._rollout is not None else {}),
+                template=self._build_pod_template(chart),
             ),
         )
 
-        for i in range(len(self._containers)):
-            depl.add_json_patch(
-                JsonPatch.add(
-                    f"/spec/template/spec/containers/{i}/env/-",
-                    {"name": "POD_OWNER", "value": depl.name},
-                )
-            )
+        self._add_pod_owner_env(depl)
+
+        if replica_range is not None:
+            autoscaler = self._autoscaler or AutoscalerBuilder()
+            hpa = autoscaler.build(chart, f"{self._tag}hpa", depl, *replica_range)
+            self._deps.append(hpa)
+
+        if self._pdb:
+            self._deps.append(self._build_pod_disruption_budget(chart))
 
         return depl
 
-    # TODO maybe move these into separate files at some point?
-    def _build_service_account(self, chart: Chart) -> k8s.KubeServiceAccount:
-        return k8s.KubeServiceAccount(chart, f"{self._tag}sa")
+    def _build_pod_disruption_budget(self, chart: Chart) -> k8s.KubePodDisruptionBudget:
+        optional: T.MutableMapping[str, T.Any] = {}
+        if self._pdb_min_available is not None:
+            optional["min_available"] = int_or_string(self._pdb_min_available)
+        elif self._pdb_max_unavailable is not None:
+            optional["max_unavailable"] = int_or_string(self._pdb_max_unavailable)
+        elif type(self._replicas) is tuple:
+            # The HPA can scale well past its minimum, so a fixed count would let a drain take out most of the
+            # pods once it has; a percentage is computed against the current replica count (rounded up)
+            optional["max_unavailable"] = int_or_string("25%")
+        else:
+            assert isinstance(self._replicas, int)
+            # With a single replica, this still allows it to be evicted, so node drains aren't blocked forever
+            optional["max_unavailable"] = int_or_string(max(1, self._replicas // 4))
 
-    def _build_service(self, chart: Chart) -> k8s.KubeService:
-        assert self._service_ports
-        return k8s.KubeService(
+        return k8s.KubePodDisruptionBudget(
             chart,
-            "service",
-            metadata={"name": self._service_name},
-            spec=k8s.ServiceSpec(
-                ports=[
-                    k8s.ServicePort(port=p, target_port=k8s.IntOrString.from_number(p)) for p in self._service_ports
-                ],
-                selector=self._selector,
-            ),
+            f"{self._tag}pdb",
+            spec=k8s.PodDisruptionBudgetSpec(selector=k8s.LabelSelector(match_labels=self._selector), **optional),
         )
-
-    def _build_role_binding_for_service_account(
-        self,
-        chart: Chart,
-        service_account: k8s.KubeServiceAccount,
-        role_name: str,
-        is_cluster_role: bool,
-    ) -> T.Union[k8s.KubeClusterRoleBinding, k8s.KubeRoleBinding]:
-        subjects = [
-            k8s.Subject(
-                kind="ServiceAccount",
-                name=service_account.name,
-                namespace=chart.namespace,
-            )
-        ]
-        role_ref = k8s.RoleRef(
-            api_group="rbac.authorization.k8s.io",
-            kind="ClusterRole" if is_cluster_role else "Role",
-            name=role_name,
-        )
-
-        if is_cluster_role:
-            return k8s.KubeClusterRoleBinding(chart, f"{self._tag}crb", subjects=subjects, role_ref=role_ref)
-        else:
-            return k8s.KubeRoleBinding(chart, f"{self._tag}rb", subjects=subjects, role_ref=role_ref)
@@ -1,6 +1,18 @@
 import typing as T
 
+from cdk8s import Chart
+
+from fireconfig import k8s
 from fireconfig.types import DownwardAPIField
+from fireconfig.types import ResourceField
+from fireconfig.util import content_hash
+
+
+def resource_field_ref(resource: ResourceField, divisor: T.Optional[str] = None) -> T.Mapping[str, T.Any]:
+    ref: T.MutableMapping[str, T.Any] = {"resource": str(resource)}
+    if divisor is not None:
+        ref["divisor"] = divisor
+    return {"resourceFieldRef": ref}
 
 
 class EnvBuilder:
@@ -9,15 +21,26 @@ class EnvBuilder:
             k: ("value", v) for (k, v) in env.items()
         }
         self._env_from: T.List[T.Mapping] = []
+        self._config_map_names: T.Optional[T.Set[str]] = None
 
     def with_field_ref(self, name: str, field: DownwardAPIField, key: T.Optional[str] = None) -> T.Self:
         field_str = str(field)
         if field in {DownwardAPIField.ANNOTATION, DownwardAPIField.LABEL}:
+            if key is None:
+                raise ValueError(f"{name} needs a key; whole label or annotation maps can only go in a volume")
             field_str = field_str.format(key)
 
         self._env[name] = ("valueFrom", {"fieldRef": {"fieldPath": field_str}})
         return self
 
+    def with_resource_field_ref(self, name: str, resource: ResourceField, divisor: T.Optional[str] = None) -> T.Self:
+        """
+        Expose one of the container's own requests or limits as an env var.  CPU values are rounded up to a
+        whole multiple of `divisor` (which defaults to "1", i.e., whole cores); memory defaults to bytes.
+        """
+        self._env[name] = ("valueFrom", resource_field_ref(resource, divisor))
+        return self
+
     def with_secrets_from(self, secret_name: str) -> T.Self:
         self._env_from.append({"secretRef": {"name": secret_name}})
         return self
@@ -26,11 +49,59 @@ class EnvBuilder:
         self._env[name] = ("valueFrom", {"secretKeyRef": {"name": secret_name, "key": secret_key_name}})
         return self
 
-    def build(self, names: T.Optional[T.Union[T.Sequence[str], T.KeysView[str]]] = None) -> T.Sequence[T.Mapping]:
+    def as_config_map(self, names: T.Optional[T.Sequence[str]] = None) -> T.Self:
+        """
+        Put the literal values (or just the ones in `names`) into a generated ConfigMap that containers pull
+        in with `envFrom`, instead of repeating them in every container spec.  The ConfigMap is immutable
+        and named by a hash of its contents, so changing a value still rolls the pods that use it.  Values
+        that reference other env vars (`$(VAR)`) stay inline, since Kubernetes only expands them in `env`.
+        """
+        self._config_map_names = set(names if names is not None else self._env.keys())
+        return self
+
+    def get(self, name: str) -> T.Optional[T.Tuple[str, T.Union[str, T.Mapping]]]:
+        """Return `("value", literal)` or `("valueFrom", source)` for `name`, or None if it isn't set"""
+        return self._env.get(name)
+
+    def config_map_data(self, names: T.Optional[T.Iterable[str]] = None) -> T.Mapping[str, str]:
+        if self._config_map_names is None:
+            return {}
+        if names is None:
+            names = self._env.keys()
+        return {
+            name: T.cast(str, self._env[name][1])
+            for name in names
+            if name in self._config_map_names
+            and self._env[name][0] == "value"
+            and "$(" not in T.cast(str, self._env[name][1])
+        }
+
+    def build_config_map(
+        self, chart: Chart, names: T.Optional[T.Iterable[str]] = None
+    ) -> T.Optional[k8s.KubeConfigMap]:
+        # Every container in the chart that uses the same values shares the same ConfigMap
+        if not (data := self.config_map_data(names)):
+            return None
+        cm_id = f"env-{content_hash(data)}"
+        if (cm := chart.node.try_find_child(cm_id)) is not None:
+            return T.cast(k8s.KubeConfigMap, cm)
+        return k8s.KubeConfigMap(chart, cm_id, data=data, immutable=True)
+
+    def build(
+        self,
+        names: T.Optional[T.Union[T.Sequence[str], T.KeysView[str]]] = None,
+        config_map: T.Optional[k8s.KubeConfigMap] = None,
+    ) -> T.Sequence[T.Mapping]:
         if names is None:
             names = self._env.keys()
 
-        return [{"name": name, self._env[name][0]: self._env[name][1]} for name in names]
+        # values that are in the ConfigMap come in through envFrom instead
+        skip = self.config_map_data(names) if config_map is not None else {}
+        return [{"name": name, self._env[name][0]: self._env[name][1]} for name in names if name not in skip]
 
-    def build_from(self) -> T.Sequence[T.Mapping]:
+    def build_from(self, config_map: T.Optional[k8s.KubeConfigMap] = None) -> T.Sequence[T.Mapping]:
+        # later envFrom sources win, so the ConfigMap goes last to keep the literal values overriding any
+        # secret keys with the same name (just like they did when they were in `env`)
+        if config_map is not None:
+            return [*self._env_from, {"configMapRef": {"name": config_map.name}}]
         return self._env_from
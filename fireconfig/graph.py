@@ -0,0 +1,239 @@
+"""
+The mermaid DAG is great for humans to look at, but it's a pain for tools to consume.  `ObjectGraph`
+holds the same information (objects, the charts they belong to, and the dependency edges between them)
+as a plain Python object, with exporters for JSON, DOT, and GraphML, and some indexed queries.
+
+Edges point from a dependency to the thing that depends on it, i.e., the same direction that things
+get applied in; so an edge `ConfigMap ---> Deployment` means "the Deployment depends on the ConfigMap".
+We also keep track of chart-level edges: every object in a chart depends on everything in the charts
+that chart depends on (this is how cdk8s orders charts), so those count towards the blast radius too.
+"""
+
+import typing as T
+from collections import defaultdict
+from collections import deque
+from xml.sax.saxutils import escape
+from xml.sax.saxutils import quoteattr
+
+import simplejson as json
+
+from fireconfig.subgraph import ChartSubgraph
+
+
+# The graph is mostly a query API, so it has a lot of (small) public methods
+class ObjectGraph:  # noqa: PLR0904
+    def __init__(self) -> None:
+        self._kinds: T.MutableMapping[str, str] = {}
+        self._charts: T.MutableMapping[str, str] = {}
+        self._chart_nodes: T.MutableMapping[str, T.List[str]] = defaultdict(list)
+
+        # Adjacency indexes; we use dicts as insertion-ordered sets so that output is deterministic
+        self._dependents: T.MutableMapping[str, T.Dict[str, None]] = defaultdict(dict)
+        self._dependencies: T.MutableMapping[str, T.Dict[str, None]] = defaultdict(dict)
+        self._chart_dependents: T.MutableMapping[str, T.Dict[str, None]] = defaultdict(dict)
+
+        self._reachable_cache: T.MutableMapping[str, T.FrozenSet[str]] = {}
+        self._depth_cache: T.MutableMapping[str, int] = {}
+
+    @classmethod
+    def from_subgraphs(
+        cls,
+        subgraph_dag: T.Mapping[str, T.List[str]],
+        subgraphs: T.Mapping[str, ChartSubgraph],
+    ) -> "ObjectGraph":
+        graph = cls()
+        for chart, sg in subgraphs.items():
+            graph._add_chart(chart)
+            for n, k in sg.nodes():
+                graph.add_node(n, k, chart)
+
+        # edges can cross charts, so only add them once all of the nodes are in
+        for sg in subgraphs.values():
+            for s, e in sg.edges():
+                graph.add_edge(s, e)
+
+        for c1, charts in subgraph_dag.items():
+            for c2 in charts:
+                graph.add_chart_edge(c1, c2)
+
+        return graph
+
+    def add_node(self, name: str, kind: str, chart: str):
+        if name not in self._kinds:
+            self._chart_nodes[chart].append(name)
+        self._kinds[name] = kind
+        self._charts[name] = chart
+        self._dependents[name]
+        self._dependencies[name]
+        self._chart_dependents[chart]
+        self._clear_caches()
+
+    def add_edge(self, s: str, t: str):
+        if s not in self._kinds or t not in self._kinds:
+            raise KeyError(f"both endpoints must be added as nodes before adding edge: {s} -> {t}")
+        self._dependents[s][t] = None
+        self._dependencies[t][s] = None
+        self._clear_caches()
+
+    def add_chart_edge(self, c1: str, c2: str):
+        self._add_chart(c1)
+        self._add_chart(c2)
+        self._chart_dependents[c1][c2] = None
+        self._clear_caches()
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._kinds
+
+    def nodes(self) -> T.List[str]:
+        return list(self._kinds.keys())
+
+    def edges(self) -> T.List[T.Tuple[str, str]]:
+        return [(s, t) for s, ts in self._dependents.items() for t in ts]
+
+    def charts(self) -> T.List[str]:
+        return list(self._chart_nodes.keys())
+
+    def chart_edges(self) -> T.List[T.Tuple[str, str]]:
+        return [(c1, c2) for c1, cs in self._chart_dependents.items() for c2 in cs]
+
+    def kind(self, name: str) -> str:
+        return self._kinds[name]
+
+    def chart(self, name: str) -> str:
+        return self._charts[name]
+
+    def dependencies(self, name: str) -> T.List[str]:
+        """The objects that `name` directly depends on"""
+        self._check_node(name)
+        return list(self._dependencies[name])
+
+    def reverse_dependencies(self, name: str) -> T.List[str]:
+        """The objects that directly depend on `name`"""
+        self._check_node(name)
+        return list(self._dependents[name])
+
+    def reachable(self, name: str) -> T.FrozenSet[str]:
+        """
+        All of the objects that transitively depend on `name` through object-level edges (not
+        including `name` itself).  Results are cached, since the graph doesn't change once it's built.
+        """
+        self._check_node(name)
+        if name not in self._reachable_cache:
+            self._reachable_cache[name] = frozenset(self._bfs([name], self._dependents)) - {name}
+        return self._reachable_cache[name]
+
+    def depth(self, name: str) -> int:
+        """
+        The length of the longest chain of dependencies leading to `name`; objects with no dependencies
+        have depth 0.  Objects at the same depth don't depend on each other, so they can be applied in
+        parallel.
+        """
+        self._check_node(name)
+        if name in self._depth_cache:
+            return self._depth_cache[name]
+
+        # iterative DFS in post-order so that very long dependency chains don't blow the stack
+        stack = [(name, False)]
+        visiting: T.Set[str] = set()
+        while stack:
+            n, expanded = stack.pop()
+            if n in self._depth_cache:
+                continue
+            if expanded:
+                deps = self._dependencies[n]
+                self._depth_cache[n] = 1 + max((self._depth_cache[d] for d in deps), default=-1)
+                visiting.discard(n)
+            else:
+                if n in visiting:
+                    raise ValueError(f"dependency cycle detected at {n}")
+                visiting.add(n)
+                stack.append((n, True))
+                stack.extend((d, False) for d in self._dependencies[n] if d not in self._depth_cache)
+        return self._depth_cache[name]
+
+    def blast_radius(self, name: str) -> T.FrozenSet[str]:
+        """
+        Everything that could be affected by a change to `name`: all of the objects that transitively
+        depend on it, plus every object in any chart that (transitively) depends on a chart containing
+        one of those objects.
+        """
+        affected = set(self.reachable(name)) | {name}
+        charts = {self._charts[n] for n in affected}
+        for c in self._bfs(charts, self._chart_dependents):
+            if c in charts:
+                continue
+            for n in self._chart_nodes[c]:
+                affected.add(n)
+
+        affected.discard(name)
+        return frozenset(affected)
+
+    def to_dict(self) -> T.Mapping[str, T.Any]:
+        return {
+            "nodes": [{"id": n, "kind": self._kinds[n], "chart": self._charts[n]} for n in self._kinds],
+            "edges": [{"source": s, "target": t} for s, t in self.edges()],
+            "charts": self.charts(),
+            "chart_edges": [{"source": c1, "target": c2} for c1, c2 in self.chart_edges()],
+        }
+
+    def to_json(self, **kwargs: T.Any) -> str:
+        return json.dumps(self.to_dict(), **kwargs)
+
+    def to_dot(self) -> str:
+        lines = ["digraph fireconfig {", "  rankdir=LR;"]
+        for i, chart in enumerate(self._chart_nodes):
+            lines.append(f"  subgraph cluster_{i} {{")
+            lines.append(f"    label={_dot_quote(chart)};")
+            for n in self._chart_nodes[chart]:
+                label = _dot_quote(f"{self._kinds[n]}\n{n.split('/')[-1]}")
+                lines.append(f"    {_dot_quote(n)} [label={label}];")
+            lines.append("  }")
+        for s, t in self.edges():
+            lines.append(f"  {_dot_quote(s)} -> {_dot_quote(t)};")
+        lines.append("}")
+        return "\n".join(lines) + "\n"
+
+    def to_graphml(self) -> str:
+        lines = [
+            '<?xml version="1.0" encoding="UTF-8"?>',
+            '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">',
+            '  <key id="kind" for="node" attr.name="kind" attr.type="string"/>',
+            '  <key id="chart" for="node" attr.name="chart" attr.type="string"/>',
+            '  <graph id="fireconfig" edgedefault="directed">',
+        ]
+        for n in self._kinds:
+            lines.append(f"    <node id={quoteattr(n)}>")
+            lines.append(f'      <data key="kind">{escape(self._kinds[n])}</data>')
+            lines.append(f'      <data key="chart">{escape(self._charts[n])}</data>')
+            lines.append("    </node>")
+        for s, t in self.edges():
+            lines.append(f"    <edge source={quoteattr(s)} target={quoteattr(t)}/>")
+        lines.extend(["  </graph>", "</graphml>"])
+        return "\n".join(lines) + "\n"
+
+    def _add_chart(self, chart: str):
+        self._chart_nodes[chart]
+        self._chart_dependents[chart]
+
+    def _clear_caches(self):
+        self._reachable_cache.clear()
+        self._depth_cache.clear()
+
+    def _check_node(self, name: str):
+        if name not in self._kinds:
+            raise KeyError(f"unknown object: {name}")
+
+    @staticmethod
+    def _bfs(start: T.Iterable[str], index: T.Mapping[str, T.Mapping[str, None]]) -> T.Set[str]:
+        seen = set(start)
+        queue = deque(seen)
+        while queue:
+            for nxt in index.get(queue.popleft(), {}):
+                if nxt not in seen:
+                    seen.add(nxt)
+                    queue.append(nxt)
+        return seen
+
+
+def _dot_quote(s: str) -> str:
+    return '"' + s.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
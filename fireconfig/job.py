@@ -0,0 +1,194 @@
+import typing as T
+
+from cdk8s import ApiObject
+from cdk8s import Chart
+from constructs import Construct
+
+from fireconfig import k8s
+from fireconfig.types import ConcurrencyPolicy
+from fireconfig.types import RestartPolicy
+from fireconfig.workload import WorkloadBuilder
+
+# Kubernetes puts the completion index of each pod of an Indexed job into this annotation
+_COMPLETION_INDEX_FIELD = "metadata.annotations['batch.kubernetes.io/job-completion-index']"
+
+
+# The generated bindings predate these job spec fields, and their `to_json` drops any field they don't know
+# about (including ones added with a JSON patch), so we add them back in after serialization
+class _KubeJob(k8s.KubeJob):
+    def __init__(self, scope: Construct, id: str, *, extra_spec: T.Mapping[str, T.Any], **kwargs: T.Any):
+        super().__init__(scope, id, **kwargs)
+        self._extra_spec = extra_spec
+
+    def to_json(self) -> T.Any:
+        obj = super().to_json()
+        obj["spec"].update(self._extra_spec)
+        return obj
+
+
+class _KubeCronJob(k8s.KubeCronJob):
+    def __init__(self, scope: Construct, id: str, *, extra_spec: T.Mapping[str, T.Any], **kwargs: T.Any):
+        super().__init__(scope, id, **kwargs)
+        self._extra_spec = extra_spec
+
+    def to_json(self) -> T.Any:
+        obj = super().to_json()
+        obj["spec"]["jobTemplate"]["spec"].update(self._extra_spec)
+        return obj
+
+
+class JobBuilder(WorkloadBuilder):
+    """
+    Builds a (run-to-completion) Job.  Indexed jobs give every pod a distinct completion index in
+    `[0, completions)`, which workers can use to pick their shard of the input (see `with_index_env`).
+    """
+
+    def __init__(self, *, app_label: str, tag: T.Optional[str] = None):
+        super().__init__(app_label=app_label, tag=tag)
+
+        self._restart_policy = RestartPolicy.Never
+        self._parallelism: T.Optional[int] = None
+        self._completions: T.Optional[int] = None
+        self._indexed: bool = False
+        self._backoff_limit: T.Optional[int] = None
+        self._backoff_limit_per_index: T.Optional[int] = None
+        self._max_failed_indexes: T.Optional[int] = None
+        self._ttl_seconds_after_finished: T.Optional[int] = None
+        self._index_env: T.Optional[T.Tuple[str, str]] = None
+
+    def with_parallelism(self, parallelism: int, completions: T.Optional[int] = None) -> T.Self:
+        """Run up to `parallelism` pods at once; leaving out `completions` keeps whatever was set before"""
+        if completions is not None:
+            if self._indexed and completions != self._completions:
+                raise ValueError(f"job {self._app_label} already has {self._completions} indexed completions")
+            self._completions = completions
+        self._parallelism = parallelism
+        return self
+
+    def with_indexed_completions(
+        self,
+        completions: int,
+        *,
+        backoff_limit_per_index: T.Optional[int] = None,
+        max_failed_indexes: T.Optional[int] = None,
+    ) -> T.Self:
+        """
+        Run `completions` pods, each with its own index.  With `backoff_limit_per_index`, each index is
+        retried independently, so one bad shard doesn't use up the retries for the whole job.
+        """
+        if max_failed_indexes is not None and backoff_limit_per_index is None:
+            raise ValueError("max_failed_indexes requires backoff_limit_per_index")
+        self._indexed = True
+        self._completions = completions
+        self._backoff_limit_per_index = backoff_limit_per_index
+        self._max_failed_indexes = max_failed_indexes
+        return self
+
+    def with_backoff_limit(self, backoff_limit: int) -> T.Self:
+        self._backoff_limit = backoff_limit
+        return self
+
+    def with_restart_policy(self, policy: RestartPolicy) -> T.Self:
+        if policy == RestartPolicy.Always:
+            raise ValueError("jobs can't use the Always restart policy")
+        self._restart_policy = policy
+        return self
+
+    def with_ttl_seconds_after_finished(self, seconds: int) -> T.Self:
+        self._ttl_seconds_after_finished = seconds
+        return self
+
+    def with_index_env(self, index_var: str = "SHARD_INDEX", count_var: str = "SHARD_COUNT") -> T.Self:
+        """Expose the pod's completion index and the total number of completions to every container"""
+        self._index_env = (index_var, count_var)
+        return self
+
+    def _build(self, meta: k8s.ObjectMeta, chart: Chart) -> ApiObject:
+        job = _KubeJob(
+            chart,
+            f"{self._tag}job",
+            metadata=meta,
+            spec=self._build_job_spec(chart),
+            extra_spec=self._extra_spec(),
+        )
+        self._add_job_env(job, "/spec/template")
+        return job
+
+    def _build_job_spec(self, chart: Chart) -> k8s.JobSpec:
+        if self._build_claim_templates():
+            raise ValueError(f"job {self._app_label} can't mount persistent claims; use a StatefulSetBuilder")
+        if self._backoff_limit_per_index is not None and self._restart_policy != RestartPolicy.Never:
+            raise ValueError("backoff_limit_per_index requires the Never restart policy")
+        if self._index_env is not None and not self._indexed:
+            raise ValueError("index env vars require an indexed job; use with_indexed_completions")
+
+        return k8s.JobSpec(
+            template=self._build_pod_template(chart),
+            parallelism=self._parallelism,
+            completions=self._completions,
+            completion_mode="Indexed" if self._indexed else None,
+            backoff_limit=self._backoff_limit,
+            ttl_seconds_after_finished=self._ttl_seconds_after_finished,
+        )
+
+    def _extra_spec(self) -> T.Mapping[str, T.Any]:
+        extra: T.MutableMapping[str, T.Any] = {}
+        if self._backoff_limit_per_index is not None:
+            extra["backoffLimitPerIndex"] = self._backoff_limit_per_index
+        if self._max_failed_indexes is not None:
+            extra["maxFailedIndexes"] = self._max_failed_indexes
+        return extra
+
+    def _add_job_env(self, obj: ApiObject, template_path: str):
+        if self._index_env is not None:
+            index_var, count_var = self._index_env
+            self._add_pod_env(
+                obj, index_var, {"valueFrom": {"fieldRef": {"fieldPath": _COMPLETION_INDEX_FIELD}}}, template_path
+            )
+            self._add_pod_env(obj, count_var, {"value": str(self._completions)}, template_path)
+        self._add_pod_owner_env(obj, template_path)
+
+
+class CronJobBuilder(JobBuilder):
+    """Builds a CronJob that runs the job (configured just like a `JobBuilder`) on `schedule`"""
+
+    def __init__(self, *, app_label: str, schedule: str, tag: T.Optional[str] = None):
+        super().__init__(app_label=app_label, tag=tag)
+
+        self._schedule = schedule
+        self._concurrency_policy: T.Optional[ConcurrencyPolicy] = None
+        self._starting_deadline_seconds: T.Optional[int] = None
+        self._time_zone: T.Optional[str] = None
+
+    def with_concurrency_policy(self, policy: ConcurrencyPolicy) -> T.Self:
+        """
+        What to do if the previous run is still going when the next one is scheduled: run both (`Allow`),
+        skip the new run (`Forbid`), or cancel the old run (`Replace`)
+        """
+        self._concurrency_policy = policy
+        return self
+
+    def with_starting_deadline_seconds(self, seconds: int) -> T.Self:
+        self._starting_deadline_seconds = seconds
+        return self
+
+    def with_time_zone(self, time_zone: str) -> T.Self:
+        self._time_zone = time_zone
+        return self
+
+    def _build(self, meta: k8s.ObjectMeta, chart: Chart) -> ApiObject:
+        cron_job = _KubeCronJob(
+            chart,
+            f"{self._tag}cronjob",
+            metadata=meta,
+            spec=k8s.CronJobSpec(
+                schedule=self._schedule,
+                job_template=k8s.JobTemplateSpec(spec=self._build_job_spec(chart)),
+                concurrency_policy=str(self._concurrency_policy) if self._concurrency_policy is not None else None,
+                starting_deadline_seconds=self._starting_deadline_seconds,
+                time_zone=self._time_zone,
+            ),
+            extra_spec=self._extra_spec(),
+        )
+        self._add_job_env(cron_job, "/spec/jobTemplate/spec/template")
+        return cron_job
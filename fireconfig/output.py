@@ -1,73 +1,303 @@
+import io
+import re
 import typing as T
+from collections import Counter
+from collections import defaultdict
 
 import simplejson as json
 from deepdiff.helper import notpresent  # type: ignore
 
+from fireconfig.configmap import MAX_CONFIG_MAP_BYTES
+from fireconfig.configmap import binary_size_delta
+from fireconfig.configmap import format_bytes
 from fireconfig.plan import DELETED_OBJS_END
 from fireconfig.plan import DELETED_OBJS_START
 from fireconfig.plan import STYLE_DEFS_END
 from fireconfig.plan import STYLE_DEFS_START
 from fireconfig.plan import ResourceChanges
 from fireconfig.plan import ResourceState
+from fireconfig.rollout import format_duration
 from fireconfig.subgraph import ChartSubgraph
 
+# GitHub rejects PR comments over 65536 characters; leave some headroom for whatever else
+# gets put into the comment template
+DEFAULT_PAGE_BUDGET = 60000
+_PAGE_HEADER_RESERVE = 64
 
-def _format_node_label(node: str, kind: str) -> str:
+# The writers below stream directly into any text file-like object, so that really large graphs
+# and diffs don't have to be assembled in memory; the `format_*` functions are thin wrappers
+# around them that write into a string buffer.
+
+
+def _write_node_label(out: T.TextIO, node: str, kind: str):
     name = node.split("/")[-1]
-    return f"  {node}[<b>{kind}</b><br>{name}]\n"
+    out.write(f"  {node}[<b>{kind}</b><br>{name}]\n")
 
 
-def format_mermaid_graph(
+def _write_value(out: T.TextIO, v: T.Any):
+    if v == notpresent:
+        out.write(str(v))
+    else:
+        json.dump(v, out, indent="  ")
+
+
+def _collapsed_node_id(chart: str) -> str:
+    return f"{chart}/__unchanged__"
+
+
+def _changed_neighborhood(
+    subgraphs: T.Mapping[str, ChartSubgraph],
+    resource_changes: T.Mapping[str, ResourceChanges],
+    hops: int,
+) -> T.Set[str]:
+    """
+    Find all of the changed (or added, or removed) objects, along with everything within `hops`
+    edges of them (in either direction).  Removed objects only show up in the "deleted lines" of
+    each subgraph, so we pull the edges for those out of the raw mermaid text.
+    """
+    adj: T.MutableMapping[str, T.Set[str]] = defaultdict(set)
+    for sg in subgraphs.values():
+        edges = list(sg.edges())
+        for ln in sg.deleted_lines():
+            if m := re.match(r"^\s*(\S+)--->(\S+)$", ln):
+                edges.append((m.group(1), m.group(2)))
+        for s, e in edges:
+            adj[s].add(e)
+            adj[e].add(s)
+
+    kept = {res for res, c in resource_changes.items() if c.state != ResourceState.Unchanged}
+    frontier = set(kept)
+    for _ in range(hops):
+        frontier = {nbr for n in frontier for nbr in adj[n]} - kept
+        if not frontier:
+            break
+        kept |= frontier
+    return kept
+
+
+def _write_chart_neighborhood(out: T.TextIO, chart: str, sg: ChartSubgraph, kept: T.Set[str]):
+    collapsed_id = _collapsed_node_id(chart)
+    collapsed = 0
+    for n, k in sg.nodes():
+        if n in kept:
+            _write_node_label(out, n, k)
+        else:
+            collapsed += 1
+    if collapsed:
+        out.write(f"  {collapsed_id}[<i>{collapsed} unchanged object(s)</i>]\n")
+
+    written: T.Set[T.Tuple[str, str]] = set()
+    for s, e in sg.edges():
+        if s not in sg and s not in kept:
+            # unchanged objects from other charts are collapsed into _their_ chart's summary node
+            continue
+        edge = (s if s in kept else collapsed_id, e if e in kept else collapsed_id)
+        if edge[0] == edge[1] or edge in written:
+            continue
+        written.add(edge)
+        out.write(f"  {edge[0]}--->{edge[1]}\n")
+
+
+def write_mermaid_graph(
+    out: T.TextIO,
     subgraph_dag: T.Mapping[str, T.List[str]],
     subgraphs: T.Mapping[str, ChartSubgraph],
     old_dag_filename: T.Optional[str],
     resource_changes: T.Mapping[str, ResourceChanges],
-) -> str:
-    mermaid = "```mermaid\n"
-    mermaid += "%%{init: {'themeVariables': {'mainBkg': '#ddd'}}}%%\n"
-    mermaid += "graph LR\n\n"
+    neighborhood_hops: T.Optional[int] = None,
+):
+    """
+    Write out the mermaid DAG.  If `neighborhood_hops` is set, only the objects that were changed, added,
+    or removed (plus their neighbors up to `neighborhood_hops` edges away) are drawn; everything else in
+    a chart is collapsed into a single summary node for that chart.  This keeps the graph small enough for
+    mermaid to lay out on really big clusters, but since unchanged objects are left out, a DAG rendered
+    this way loses some information for detecting deleted objects when it's used as the "old" DAG.
+    """
+    kept = None
+    if neighborhood_hops is not None:
+        kept = _changed_neighborhood(subgraphs, resource_changes, neighborhood_hops)
+
+    out.write("```mermaid\n")
+    out.write("%%{init: {'themeVariables': {'mainBkg': '#ddd'}}}%%\n")
+    out.write("graph LR\n\n")
 
     # Colors taken from https://personal.sron.nl/~pault/#sec:qualitative
-    mermaid += "classDef default color:#000\n"
+    out.write("classDef default color:#000\n")
 
     for chart, sg in subgraphs.items():
-        mermaid += f"subgraph {chart}\n"
-        mermaid += "  direction LR\n"
-        for n, k in sg.nodes():
-            mermaid += _format_node_label(n, k)
+        out.write(f"subgraph {chart}\n")
+        out.write("  direction LR\n")
+        if kept is not None:
+            _write_chart_neighborhood(out, chart, sg, kept)
+        else:
+            for n, k in sg.nodes():
+                _write_node_label(out, n, k)
 
-        for s, e in sg.edges():
-            mermaid += f"  {s}--->{e}\n"
+            for s, e in sg.edges():
+                out.write(f"  {s}--->{e}\n")
 
-        mermaid += f"{DELETED_OBJS_START}\n"
+        out.write(f"{DELETED_OBJS_START}\n")
         for del_line in sg.deleted_lines():
-            mermaid += del_line
-        mermaid += f"{DELETED_OBJS_END}\n"
-        mermaid += "end\n\n"
+            out.write(del_line)
+        out.write(f"{DELETED_OBJS_END}\n")
+        out.write("end\n\n")
 
     for sg1, edges in subgraph_dag.items():
         for sg2 in edges:
-            mermaid += f"{sg1}--->{sg2}\n"
+            out.write(f"{sg1}--->{sg2}\n")
 
-    mermaid += f"\n{STYLE_DEFS_START}\n"
+    out.write(f"\n{STYLE_DEFS_START}\n")
     for res, changes in resource_changes.items():
         if changes.state != ResourceState.Unchanged:
-            mermaid += f"  style {res} fill:{changes.state.value}\n"
-    mermaid += f"{STYLE_DEFS_END}\n"
-    mermaid += "```\n\n"
+            out.write(f"  style {res} fill:{changes.state.value}\n")
+    out.write(f"{STYLE_DEFS_END}\n")
+    out.write("```\n\n")
+
+
+def format_mermaid_graph(
+    subgraph_dag: T.Mapping[str, T.List[str]],
+    subgraphs: T.Mapping[str, ChartSubgraph],
+    old_dag_filename: T.Optional[str],
+    resource_changes: T.Mapping[str, ResourceChanges],
+    neighborhood_hops: T.Optional[int] = None,
+) -> str:
+    buf = io.StringIO()
+    write_mermaid_graph(buf, subgraph_dag, subgraphs, old_dag_filename, resource_changes, neighborhood_hops)
+    return buf.getvalue()
+
 
-    return mermaid
+def _write_change(out: T.TextIO, path: str, r1: T.Any, r2: T.Any):
+    out.write(f"```\n{path}:\n")
+    _write_value(out, r1)
+    out.write(" --> ")
+    _write_value(out, r2)
+    if (delta := binary_size_delta(r1, r2)) is not None:
+        out.write(f"\n({delta:+} bytes)")
+    out.write("\n```\n\n")
+
+
+def _estimates(c: ResourceChanges) -> str:
+    lines = ""
+    if c.rollout_seconds is not None:
+        lines += f"_Estimated rollout time: {format_duration(c.rollout_seconds)}_\n\n"
+    if c.size_bytes is not None:
+        lines += f"_Size: {format_bytes(c.size_bytes)} of {format_bytes(MAX_CONFIG_MAP_BYTES)} limit_\n\n"
+    return lines
+
+
+def write_resource_diff(out: T.TextIO, res: str, c: ResourceChanges):
+    out.write(f"<details><summary>\n\n#### {res}: {c.state.name}\n\n</summary>\n\n")
+    out.write(_estimates(c))
+    for path, r1, r2 in c.changes:
+        _write_change(out, path, r1, r2)
+    out.write("</details>\n")
+
+
+def write_diff(out: T.TextIO, resource_changes: T.Mapping[str, ResourceChanges]):
+    for res, c in sorted(resource_changes.items()):
+        write_resource_diff(out, res, c)
 
 
 def format_diff(resource_changes: T.Mapping[str, ResourceChanges]) -> str:
-    diff_details = ""
+    buf = io.StringIO()
+    write_diff(buf, resource_changes)
+    return buf.getvalue()
+
+
+def _byte_len(s: str) -> int:
+    return len(s.encode("utf-8"))
+
+
+def _write_truncated_resource_diff(out: T.TextIO, res: str, c: ResourceChanges, budget: int):
+    """
+    Write as many of the changes for `res` as will fit inside `budget`, and then a note about
+    how many were left out; the `<details>` block is always closed, so the page stays valid markdown
+    """
+    footer = "</details>\n"
+    header = f"<details><summary>\n\n#### {res}: {c.state.name} (truncated)\n\n</summary>\n\n"
+    header += _estimates(c)
+    out.write(header)
+    used = _byte_len(header) + _byte_len(footer)
+
+    for i, (path, r1, r2) in enumerate(c.changes):
+        buf = io.StringIO()
+        _write_change(buf, path, r1, r2)
+        change = buf.getvalue()
+
+        # save room for the "omitted" note, which is never longer than this
+        note_reserve = 128 + _byte_len(path)
+        if used + _byte_len(change) + note_reserve > budget:
+            remaining = c.changes[i:]
+            out.write(f"_{len(remaining)} more change(s) omitted, starting at `{path}`_\n\n")
+            break
+        out.write(change)
+        used += _byte_len(change)
+
+    out.write(footer)
+
+
+def write_plan_summary(out: T.TextIO, resource_changes: T.Mapping[str, ResourceChanges]):
+    counts = Counter(c.state for c in resource_changes.values())
+    out.write("### Summary\n\n")
+    if not counts:
+        out.write("No changes.\n\n")
+        return
+
+    out.write("| State | Count |\n|---|---|\n")
+    for state in ResourceState:
+        if counts[state]:
+            out.write(f"| {state.name} | {counts[state]} |\n")
+    out.write("\n")
+
+
+def paginate_plan(
+    resource_changes: T.Mapping[str, ResourceChanges],
+    graph: T.Optional[str] = None,
+    budget: int = DEFAULT_PAGE_BUDGET,
+) -> T.List[str]:
+    """
+    Split the plan up into pages that are each at most `budget` bytes long, so that they can be posted
+    as separate PR comments.  The first page starts with a summary of the changes (and the mermaid graph,
+    if one is passed in and it fits); after that, the per-resource diffs are packed into pages in sorted
+    order, only ever breaking at `<details>` boundaries.  A single resource diff that won't fit on a page
+    by itself is truncated.  Every page is prefixed with a "page i of N" header.
+
+    This is done in a single pass over the sorted resource changes; each diff is rendered exactly once
+    (twice if it needs to be truncated).
+    """
+    content_budget = budget - _PAGE_HEADER_RESERVE
+    if content_budget <= 0:
+        raise ValueError(f"page budget too small: {budget}")
+
+    pages: T.List[str] = []
+    current = io.StringIO()
+    write_plan_summary(current, resource_changes)
+    if graph is not None:
+        if _byte_len(current.getvalue()) + _byte_len(graph) <= content_budget:
+            current.write(graph)
+        else:
+            current.write("_The object graph is too large to include in the plan._\n\n")
+    current_len = _byte_len(current.getvalue())
 
     for res, c in sorted(resource_changes.items()):
-        diff_details += f"<details><summary>\n\n#### {res}: {c.state.name}\n\n</summary>\n\n"
-        for path, r1, r2 in c.changes:
-            r1_str = json.dumps(r1, indent="  ") if r1 != notpresent else r1
-            r2_str = json.dumps(r2, indent="  ") if r2 != notpresent else r2
-            diff_details += f"```\n{path}:\n{r1_str} --> {r2_str}\n```\n\n"
-        diff_details += "</details>\n"
-
-    return diff_details
+        block = io.StringIO()
+        write_resource_diff(block, res, c)
+        block_str = block.getvalue()
+        block_len = _byte_len(block_str)
+
+        if block_len > content_budget:
+            block = io.StringIO()
+            _write_truncated_resource_diff(block, res, c, content_budget)
+            block_str = block.getvalue()
+            block_len = _byte_len(block_str)
+
+        if current_len + block_len > content_budget:
+            pages.append(current.getvalue())
+            current = io.StringIO()
+            current_len = 0
+
+        current.write(block_str)
+        current_len += block_len
+
+    pages.append(current.getvalue())
+    return [f"### Plan (page {i + 1} of {len(pages)})\n\n{page}" for i, page in enumerate(pages)]
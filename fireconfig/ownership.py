@@ -0,0 +1,68 @@
+"""
+Some fields of a Kubernetes object are managed by a controller instead of by us; for example, the
+HPA sets `spec.replicas` on a Deployment, and a VPA sets the container resources.  Differences in those
+fields are just noise in the plan, so `OwnedFields` lets you declare them (either for every object of a
+given kind, or for a single object) and they get pruned from both the old and new manifests before the
+diff is computed.
+
+Paths are written as JSON pointers (the same format cdk8s uses for JSON patches), e.g. `/spec/replicas`;
+a `*` path component matches every entry in a list or mapping.
+"""
+
+import typing as T
+from collections import defaultdict
+
+WILDCARD = "*"
+
+
+def _parse_path(path: str) -> T.List[str]:
+    if not path.startswith("/"):
+        raise ValueError(f"owned field paths must be JSON pointers starting with '/': {path}")
+    return [p.replace("~1", "/").replace("~0", "~") for p in path[1:].split("/")]
+
+
+def _matching_keys(obj: T.Any, key: str) -> T.List[T.Union[str, int]]:
+    if isinstance(obj, T.Mapping):
+        return list(obj.keys()) if key == WILDCARD else [key] if key in obj else []
+    elif isinstance(obj, T.Sequence) and not isinstance(obj, str):
+        if key == WILDCARD:
+            return list(range(len(obj)))
+        return [int(key)] if key.isdigit() and int(key) < len(obj) else []
+    return []
+
+
+def _prune(obj: T.Any, path: T.Sequence[str]):
+    if not path:
+        return
+
+    # delete in reverse order so that list indices stay valid
+    for k in reversed(_matching_keys(obj, path[0])):
+        if len(path) > 1:
+            _prune(obj[k], path[1:])
+        else:
+            del obj[k]
+
+
+class OwnedFields:
+    def __init__(self) -> None:
+        self._by_kind: T.MutableMapping[str, T.List[T.List[str]]] = defaultdict(list)
+        self._by_object: T.MutableMapping[str, T.List[T.List[str]]] = defaultdict(list)
+
+    def with_kind_field(self, kind: str, path: str) -> T.Self:
+        self._by_kind[kind].append(_parse_path(path))
+        return self
+
+    def with_object_field(self, owned_name: str, path: str) -> T.Self:
+        self._by_object[owned_name].append(_parse_path(path))
+        return self
+
+    def with_hpa_replicas(self, kind: str = "Deployment") -> T.Self:
+        return self.with_kind_field(kind, "/spec/replicas")
+
+    def with_vpa_resources(self, kind: str = "Deployment") -> T.Self:
+        return self.with_kind_field(kind, "/spec/template/spec/containers/*/resources")
+
+    def prune(self, owned_name: str, obj: T.MutableMapping[str, T.Any]):
+        """Remove all of the owned fields from `obj` (in place)"""
+        for path in self._by_kind.get(obj.get("kind", ""), []) + self._by_object.get(owned_name, []):
+            _prune(obj, path)
@@ -4,32 +4,56 @@ The rough outline of steps taken is
 
 1. For each chart, walk the dependency graph to construct a DAG (`walk_dep_graph`)
 2. Compute a diff between the newly-generated manifests and the old ones (`compute_diff`)
-3. Turn that diff into a list of per-resource changes (`get_resource_changes`)
+3. Turn that diff into a list of per-resource changes (`get_resource_changes`), and estimate how
+   long any rollouts will take (`add_rollout_estimates`)
 4. Find out what's been deleted since the last run and add that into the graph (`find_deleted_nodes`)
+
+The result can also be turned into a structured `Plan` object (`build_plan`), which can be serialized
+to JSON for consumption by other tools.
 """
 
 import re
 import typing as T
 from collections import defaultdict
+from dataclasses import asdict
+from dataclasses import dataclass
+from dataclasses import field
 from enum import Enum
 from glob import glob
 
+import simplejson as json
 import yaml
 from cdk8s import App
 from cdk8s import DependencyVertex
 from deepdiff import DeepDiff  # type: ignore
 from deepdiff.helper import notpresent  # type: ignore
+from deepdiff.path import parse_path  # type: ignore
 
+from fireconfig.configmap import config_map_size
+from fireconfig.configmap import summarize_binary_data
+from fireconfig.graph import ObjectGraph
+from fireconfig.ownership import OwnedFields
+from fireconfig.rollout import estimate_rollout_seconds
 from fireconfig.subgraph import ChartSubgraph
 from fireconfig.util import owned_name
 from fireconfig.util import owned_name_from_dict
 
-GLOBAL_CHART_NAME = "global"
 DELETED_OBJS_START = "%% DELETED OBJECTS START"
 DELETED_OBJS_END = "%% DELETED OBJECTS END"
 STYLE_DEFS_START = "%% STYLE DEFINITIONS START"
 STYLE_DEFS_END = "%% STYLE DEFINITIONS END"
 
+# Fields that the API server won't let you update; changing them means deleting and recreating the object
+_IMMUTABLE_PATHS: T.Mapping[str, T.Tuple[str, ...]] = {
+    "Job": ("root['spec']['template']",),
+    "StatefulSet": (
+        "root['spec']['volumeClaimTemplates']",
+        "root['spec']['podManagementPolicy']",
+        "root['spec']['serviceName']",
+        "root['spec']['selector']",
+    ),
+}
+
 ChangeTuple = T.Tuple[str, T.Union[T.Mapping, notpresent], T.Union[T.Mapping, notpresent]]
 
 
@@ -38,6 +62,7 @@ class ResourceState(Enum):
     Unchanged = ""
     Changed = "#6ce"
     ChangedWithPodRecreate = "#cb4"
+    Replaced = "#a37"
     Added = "#283"
     Removed = "#e67"
     Unknown = "#f00"
@@ -47,6 +72,8 @@ class ResourceChanges:
     def __init__(self) -> None:
         self._state: ResourceState = ResourceState.Unchanged
         self._changes: T.List[ChangeTuple] = []
+        self._rollout_seconds: T.Optional[int] = None
+        self._size_bytes: T.Optional[int] = None
 
     @property
     def state(self) -> ResourceState:
@@ -56,6 +83,20 @@ class ResourceChanges:
     def changes(self) -> T.List[ChangeTuple]:
         return self._changes
 
+    @property
+    def rollout_seconds(self) -> T.Optional[int]:
+        return self._rollout_seconds
+
+    def set_rollout_estimate(self, seconds: int):
+        self._rollout_seconds = seconds
+
+    @property
+    def size_bytes(self) -> T.Optional[int]:
+        return self._size_bytes
+
+    def set_size(self, size_bytes: int):
+        self._size_bytes = size_bytes
+
     def update_state(self, change_type: str, path: str, kind: T.Optional[str]):
         """
         Given a particular resource, update the state (added, removed, changed, etc) for
@@ -68,10 +109,11 @@ class ResourceChanges:
         entire object as added or removed; otherwise if some sub-dictionary was added or removed,
         the root object was just "changed".
 
-        We use the `kind` field to determine whether pod recreation needs to happen.  This entire
+        We use the `kind` field to determine whether pod recreation needs to happen, and whether the
+        change touches an immutable field (in which case the whole object has to be replaced).  This entire
         function is currently very hacky and incomplete, it would be good to make this more robust sometime.
         """
-        if self._state in {ResourceState.Added, ResourceState.Removed}:
+        if self._state in {ResourceState.Added, ResourceState.Removed, ResourceState.Replaced}:
             return
 
         if path == "root":
@@ -81,9 +123,11 @@ class ResourceChanges:
                 self._state = ResourceState.Added
             else:
                 self._state = ResourceState.Unknown
+        elif kind is not None and path.startswith(_IMMUTABLE_PATHS.get(kind, ())):
+            self._state = ResourceState.Replaced
         elif self._state == ResourceState.ChangedWithPodRecreate:
             return
-        elif kind == "Deployment":
+        elif kind in {"Deployment", "StatefulSet", "DaemonSet"}:
             # TODO - this is obviously incomplete, it will not detect all cases
             # when pod recreation happens
             if path.startswith("root['spec']['template']['spec']") or path.startswith("root['spec']['selector']"):
@@ -97,10 +141,15 @@ class ResourceChanges:
         self._changes.append((path, r1, r2))
 
 
-def compute_diff(app: App) -> T.Tuple[T.Mapping[str, T.Any], T.Mapping[str, str]]:
+def compute_diff(
+    app: App,
+    owned_fields: T.Optional[OwnedFields] = None,
+) -> T.Tuple[T.Mapping[str, T.Any], T.Mapping[str, str]]:
     """
     To compute a diff, we look at the old YAML files that were written out "last time", and
-    compare them to the generated YAML by cdk8s "this time".
+    compare them to the generated YAML by cdk8s "this time".  Any fields that are owned by some
+    other controller (see `OwnedFields`) are removed from both sides first, so they never show up
+    in the diff, and binary ConfigMap data is replaced by its size and hash.
     """
 
     kinds = {}
@@ -113,13 +162,22 @@ def compute_diff(app: App) -> T.Tuple[T.Mapping[str, T.Any], T.Mapping[str, str]
                 old_chart = parsed_filename.group(2)
             for old_obj in yaml.safe_load_all(f):
                 node_id = owned_name_from_dict(old_obj, old_chart)
+                if owned_fields is not None:
+                    owned_fields.prune(node_id, old_obj)
+                if old_obj["kind"] == "ConfigMap":
+                    summarize_binary_data(old_obj)
                 old_defs[node_id] = old_obj
+                kinds[node_id] = old_obj["kind"]
 
     new_defs = {}
     for chart in app.charts:
         for new_obj in chart.api_objects:
             node_id = owned_name(new_obj)
             new_defs[node_id] = new_obj.to_json()
+            if owned_fields is not None:
+                owned_fields.prune(node_id, new_defs[node_id])
+            if new_obj.kind == "ConfigMap":
+                summarize_binary_data(new_defs[node_id])
             kinds[node_id] = new_obj.kind
 
     # threshold_to_diff_deeper was added in deepdiff 8.0.0
@@ -158,6 +216,41 @@ def get_resource_changes(diff: T.Mapping[str, T.Any], kinds: T.Mapping[str, str]
     return resource_changes
 
 
+def add_rollout_estimates(app: App, resource_changes: T.Mapping[str, ResourceChanges]):
+    """
+    For every deployment whose pods are going to get recreated, estimate how long the rollout will
+    take; if the deployment is scaled by an HPA, we use the HPA's minimum replica count.
+    """
+    hpa_min_replicas = {}
+    deployments = {}
+    for chart in app.charts:
+        for obj in chart.api_objects:
+            if obj.kind == "HorizontalPodAutoscaler":
+                spec = obj.to_json()["spec"]
+                hpa_min_replicas[(chart.namespace, spec["scaleTargetRef"]["name"])] = spec.get("minReplicas", 1)
+            elif obj.kind == "Deployment":
+                deployments[owned_name(obj)] = (chart.namespace, obj)
+
+    for name, (ns, depl) in deployments.items():
+        if name in resource_changes and resource_changes[name].state == ResourceState.ChangedWithPodRecreate:
+            replicas = hpa_min_replicas.get((ns, depl.name))
+            resource_changes[name].set_rollout_estimate(estimate_rollout_seconds(depl.to_json(), replicas))
+
+
+def add_config_map_sizes(app: App, resource_changes: T.Mapping[str, ResourceChanges]):
+    """
+    Record the payload size of every ConfigMap that was added or changed, so that the plan shows how close
+    each one is to the apiserver's size limit.
+    """
+    for chart in app.charts:
+        for obj in chart.api_objects:
+            name = owned_name(obj)
+            if obj.kind != "ConfigMap" or name not in resource_changes:
+                continue
+            if resource_changes[name].state not in {ResourceState.Unchanged, ResourceState.Removed}:
+                resource_changes[name].set_size(config_map_size(obj.to_json()))
+
+
 def find_deleted_nodes(
     subgraphs: T.Mapping[str, ChartSubgraph],
     resource_changes: T.Mapping[str, ResourceChanges],
@@ -197,3 +290,84 @@ def find_deleted_nodes(
             for chart, ln in old_dag_lines:
                 if res in ln:
                     subgraphs[chart].add_deleted_line(ln)
+
+
+@dataclass
+class PlannedChange:
+    path: T.List[T.Union[str, int]]
+    old: T.Any
+    new: T.Any
+    old_present: bool
+    new_present: bool
+
+
+@dataclass
+class PlannedResource:
+    owned_name: str
+    kind: T.Optional[str]
+    chart: T.Optional[str]
+    state: str
+    changes: T.List[PlannedChange] = field(default_factory=list)
+    dependencies: T.List[str] = field(default_factory=list)
+    dependents: T.List[str] = field(default_factory=list)
+    depth: T.Optional[int] = None
+    rollout_seconds: T.Optional[int] = None
+    size_bytes: T.Optional[int] = None
+
+
+@dataclass
+class Plan:
+    """
+    A structured version of the plan, for tools that want to act on what changed without scraping the
+    markdown output.  Every object in the DAG is listed (including unchanged ones, so that consumers
+    can see the whole graph), plus any objects that have been removed since the last run.  Removed
+    objects aren't in the DAG anymore, so they have no dependency information.
+    """
+
+    resources: T.List[PlannedResource]
+
+    def changed(self) -> T.List[PlannedResource]:
+        return [r for r in self.resources if r.state != ResourceState.Unchanged.name]
+
+    def to_dict(self) -> T.Mapping[str, T.Any]:
+        return asdict(self)
+
+    def to_json(self, **kwargs: T.Any) -> str:
+        return json.dumps(self.to_dict(), **kwargs)
+
+
+def build_plan(
+    graph: ObjectGraph,
+    resource_changes: T.Mapping[str, ResourceChanges],
+    kinds: T.Mapping[str, str],
+) -> Plan:
+    resources = []
+    for name in sorted(set(graph.nodes()) | set(resource_changes.keys())):
+        changes = resource_changes.get(name, ResourceChanges())
+        res = PlannedResource(
+            owned_name=name,
+            kind=kinds.get(name),
+            chart=None,
+            state=changes.state.name,
+            rollout_seconds=changes.rollout_seconds,
+            size_bytes=changes.size_bytes,
+            changes=[
+                PlannedChange(
+                    path=parse_path(path),
+                    old=None if r1 == notpresent else r1,
+                    new=None if r2 == notpresent else r2,
+                    old_present=r1 != notpresent,
+                    new_present=r2 != notpresent,
+                )
+                for path, r1, r2 in changes.changes
+            ],
+        )
+        if name in graph:
+            res.kind = graph.kind(name)
+            res.chart = graph.chart(name)
+            res.dependencies = graph.dependencies(name)
+            res.dependents = graph.reverse_dependencies(name)
+            res.depth = graph.depth(name)
+        resources.append(res)
+
+    return Plan(resources)
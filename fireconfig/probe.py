@@ -0,0 +1,87 @@
+import typing as T
+
+from fireconfig import k8s
+from fireconfig.util import int_or_string
+
+
+class HttpCheck(T.NamedTuple):
+    path: str = "/healthz"
+    port: T.Optional[int] = None
+    scheme: str = "HTTP"
+
+
+class GrpcCheck(T.NamedTuple):
+    port: T.Optional[int] = None
+    service: T.Optional[str] = None
+
+
+class TcpCheck(T.NamedTuple):
+    port: T.Optional[int] = None
+
+
+class ExecCheck(T.NamedTuple):
+    command: T.Sequence[str]
+
+
+ProbeCheck = T.Union[HttpCheck, GrpcCheck, TcpCheck, ExecCheck]
+
+
+class ProbeTimings(T.NamedTuple):
+    initial_delay_seconds: T.Optional[int] = None
+    period_seconds: T.Optional[int] = None
+    timeout_seconds: T.Optional[int] = None
+    success_threshold: T.Optional[int] = None
+    failure_threshold: T.Optional[int] = None
+
+
+# Readiness is checked often, so that pods start getting traffic as soon as they're warm; liveness is
+# more relaxed so that a briefly-overloaded pod doesn't get killed; startup gives slow-starting pods
+# (e.g. JVMs) up to 5 minutes before the liveness probe takes over.
+READINESS_DEFAULTS = ProbeTimings(period_seconds=5, failure_threshold=3)
+LIVENESS_DEFAULTS = ProbeTimings(period_seconds=10, timeout_seconds=5, failure_threshold=3)
+STARTUP_DEFAULTS = ProbeTimings(period_seconds=5, failure_threshold=60)
+
+
+def _resolve_port(port: T.Optional[int], ports: T.Sequence[int]) -> int:
+    if port is not None:
+        return port
+    if not ports:
+        raise ValueError("probe has no port and the container doesn't expose any; use with_ports or set the port")
+    return ports[0]
+
+
+def build_probe(
+    check: T.Optional[ProbeCheck],
+    timings: ProbeTimings,
+    defaults: ProbeTimings,
+    ports: T.Sequence[int],
+) -> k8s.Probe:
+    """
+    Build a probe for a container.  If no check is given, we just check that the container's first port
+    is accepting TCP connections; checks with no port also use the container's first port.  Any timings
+    that aren't set fall back to the defaults for that type of probe.
+    """
+    optional: T.MutableMapping[str, T.Any] = {}
+    match check:
+        case None | TcpCheck():
+            port = check.port if check is not None else None
+            optional["tcp_socket"] = k8s.TcpSocketAction(port=int_or_string(_resolve_port(port, ports)))
+        case HttpCheck():
+            optional["http_get"] = k8s.HttpGetAction(
+                path=check.path,
+                port=int_or_string(_resolve_port(check.port, ports)),
+                scheme=check.scheme,
+            )
+        case GrpcCheck():
+            optional["grpc"] = k8s.GrpcAction(port=_resolve_port(check.port, ports), service=check.service)
+        case ExecCheck():
+            optional["exec"] = k8s.ExecAction(command=check.command)
+
+    for field, default in defaults._asdict().items():
+        value = getattr(timings, field)
+        if value is None:
+            value = default
+        if value is not None:
+            optional[field] = value
+
+    return k8s.Probe(**optional)
@@ -0,0 +1,101 @@
+import typing as T
+
+from fireconfig.configmap import ConfigMapData
+from fireconfig.types import DownwardAPIField
+from fireconfig.util import content_hash
+
+
+class ConfigMapSource(T.NamedTuple):
+    name: str
+    data: ConfigMapData
+    subdir: T.Optional[str]
+    immutable: bool
+
+
+ProjectedSource = T.Union[ConfigMapSource, T.Mapping[str, T.Any]]
+
+
+def _join(subdir: T.Optional[str], path: str) -> str:
+    return path if subdir is None else f"{subdir}/{path}"
+
+
+class ProjectedVolumeBuilder:
+    """
+    Collects ConfigMaps, Secrets, downward API fields, and service account tokens into a single
+    (projected) volume, so a pod with lots of small config sources only needs one volume and one mount.
+    Pass the result to `VolumesBuilder.with_projected`; the ConfigMaps are created when the volume is built.
+    """
+
+    def __init__(self, default_mode: T.Optional[int] = None) -> None:
+        self._default_mode = default_mode
+        self._sources: T.List[ProjectedSource] = []
+
+    @property
+    def default_mode(self) -> T.Optional[int]:
+        return self._default_mode
+
+    @property
+    def sources(self) -> T.Sequence[ProjectedSource]:
+        return self._sources
+
+    def with_config_map(
+        self,
+        data: ConfigMapData,
+        subdir: T.Optional[str] = None,
+        immutable: bool = False,
+        name: T.Optional[str] = None,
+    ) -> T.Self:
+        """
+        Add a ConfigMap containing `data`.  The ConfigMap is named after the volume and `name`, which defaults
+        to `subdir` (or a hash of the keys in `data`, if there's no subdir), so that adding or removing other
+        sources doesn't rename it.
+        """
+        if name is None:
+            name = subdir.strip("/").replace("/", "-") if subdir else content_hash(sorted(data))
+        if any(isinstance(src, ConfigMapSource) and src.name == name for src in self._sources):
+            raise ValueError(f"projected volume already has a ConfigMap named {name}; pass a different name")
+        self._sources.append(ConfigMapSource(name, data, subdir, immutable))
+        return self
+
+    def with_secret(
+        self,
+        secret_name: str,
+        keys: T.Optional[T.Sequence[str]] = None,
+        subdir: T.Optional[str] = None,
+    ) -> T.Self:
+        secret: T.MutableMapping[str, T.Any] = {"name": secret_name}
+        if keys is not None or subdir is not None:
+            if keys is None:
+                raise ValueError(f"need to list the keys from secret {secret_name} to put them in {subdir}")
+            secret["items"] = [{"key": k, "path": _join(subdir, k)} for k in keys]
+        self._sources.append({"secret": secret})
+        return self
+
+    def with_field_ref(self, path: str, field: DownwardAPIField, key: T.Optional[str] = None) -> T.Self:
+        """
+        Project a pod metadata field into the file at `path`.  For labels and annotations, leaving out `key`
+        projects the whole map (one `key="value"` per line), which is only possible in a volume.
+        """
+        # Only pod metadata can be projected into files; everything else is only available as an env var
+        field_str = str(field)
+        if not field_str.startswith("metadata."):
+            raise ValueError(f"{field} can't be used in a downward API volume")
+        if field in {DownwardAPIField.ANNOTATION, DownwardAPIField.LABEL}:
+            field_str = field_str.format(key) if key is not None else field_str.split("[")[0]
+
+        self._sources.append({"downwardAPI": {"items": [{"path": path, "fieldRef": {"fieldPath": field_str}}]}})
+        return self
+
+    def with_service_account_token(
+        self,
+        path: str,
+        audience: T.Optional[str] = None,
+        expiration_seconds: T.Optional[int] = None,
+    ) -> T.Self:
+        token: T.MutableMapping[str, T.Any] = {"path": path}
+        if audience is not None:
+            token["audience"] = audience
+        if expiration_seconds is not None:
+            token["expirationSeconds"] = expiration_seconds
+        self._sources.append({"serviceAccountToken": token})
+        return self
@@ -1,29 +1,148 @@
+import re
 import typing as T
+from decimal import Decimal
 
 from fireconfig import k8s
+from fireconfig.types import QoSClass
+from fireconfig.types import ResourceProfile
 
 ResourceMap = T.Mapping[str, T.Union[int, str]]
 QuantityMap = T.Mapping[str, k8s.Quantity]
 MutableQuantityMap = T.MutableMapping[str, k8s.Quantity]
 
+_QUANTITY_SUFFIXES = {
+    "n": Decimal("1e-9"),
+    "u": Decimal("1e-6"),
+    "m": Decimal("1e-3"),
+    "": Decimal(1),
+    "k": Decimal(10**3),
+    "M": Decimal(10**6),
+    "G": Decimal(10**9),
+    "T": Decimal(10**12),
+    "P": Decimal(10**15),
+    "E": Decimal(10**18),
+    "Ki": Decimal(2**10),
+    "Mi": Decimal(2**20),
+    "Gi": Decimal(2**30),
+    "Ti": Decimal(2**40),
+    "Pi": Decimal(2**50),
+    "Ei": Decimal(2**60),
+}
+
+# <signed number><suffix>, where the suffix is either one of the above or a decimal exponent (e.g., `1e3`);
+# the exponent is tried first so that `1E3` is 1000 and `1E` is an exabyte
+_QUANTITY_RE = re.compile(r"([+-]?(?:[0-9]+(?:\.[0-9]*)?|\.[0-9]+))(?:[eE]([+-]?[0-9]+)|([a-zA-Z]*))")
+
+
+def parse_quantity(v: T.Union[int, str]) -> k8s.Quantity:
+    match v:
+        case str():
+            return k8s.Quantity.from_string(v)
+        case int():
+            return k8s.Quantity.from_number(v)
+
 
 def parse_resource_map(m: ResourceMap) -> QuantityMap:
     q: MutableQuantityMap = {}
     for k, v in m.items():
-        match v:
-            case str():
-                q[k] = k8s.Quantity.from_string(v)
-            case int():
-                q[k] = k8s.Quantity.from_number(v)
+        q[k] = parse_quantity(v)
     return q
 
 
+def quantity_value(v: T.Union[int, str]) -> Decimal:
+    """Convert a Kubernetes quantity (e.g., `500m` or `8Gi`) into a number, so that we can compare them"""
+    if isinstance(v, int):
+        return Decimal(v)
+
+    match = _QUANTITY_RE.fullmatch(v.strip())
+    if match is None:
+        raise ValueError(f"could not parse resource quantity: {v}")
+
+    number, exponent, suffix = match.groups()
+    if exponent is not None:
+        return Decimal(number).scaleb(int(exponent))
+    if suffix not in _QUANTITY_SUFFIXES:
+        raise ValueError(f"could not parse resource quantity: {v}")
+    return Decimal(number) * _QUANTITY_SUFFIXES[suffix]
+
+
+def format_memory(v: Decimal) -> str:
+    for suffix in ("Ei", "Pi", "Ti", "Gi", "Mi", "Ki"):
+        scaled = v / _QUANTITY_SUFFIXES[suffix]
+        if scaled >= 1 and scaled == scaled.to_integral_value():
+            return f"{int(scaled)}{suffix}"
+    return str(int(v.to_integral_value()))
+
+
+def pod_qos_class(classes: T.Iterable[QoSClass]) -> QoSClass:
+    classes = set(classes)
+    if classes == {QoSClass.Guaranteed}:
+        return QoSClass.Guaranteed
+    elif not classes or classes == {QoSClass.BestEffort}:
+        return QoSClass.BestEffort
+    return QoSClass.Burstable
+
+
 class Resources:
     def __init__(self, requests: T.Optional[ResourceMap], limits: T.Optional[ResourceMap]):
         self.requests: T.Optional[QuantityMap] = None
         self.limits: T.Optional[QuantityMap] = None
+        self._raw_requests = requests or {}
+        self._raw_limits = limits or {}
 
         if requests is not None:
             self.requests = parse_resource_map(requests)
         if limits is not None:
             self.limits = parse_resource_map(limits)
+
+    @classmethod
+    def from_profile(
+        cls,
+        profile: ResourceProfile,
+        cpu: T.Optional[T.Union[int, str]],
+        memory: T.Optional[T.Union[int, str]],
+    ) -> "Resources":
+        """
+        The "guaranteed" profile sets requests equal to limits for both CPU and memory (so the pod gets the
+        Guaranteed QoS class), and requires a whole number of CPUs, so that the kubelet's static CPU manager
+        policy can give the container exclusive cores.
+        """
+        if profile == ResourceProfile.Guaranteed:
+            if cpu is None or memory is None:
+                raise ValueError("the guaranteed resource profile requires both cpu and memory")
+            cpu_value = quantity_value(cpu)
+            if cpu_value < 1 or cpu_value != cpu_value.to_integral_value():
+                raise ValueError(f"the guaranteed resource profile requires a whole number of CPUs, got {cpu}")
+
+            resources = {"cpu": int(cpu_value), "memory": memory}
+            return cls(resources, resources)
+
+        raise ValueError(f"unknown resource profile: {profile}")
+
+    def with_extra_memory(self, amount: Decimal) -> "Resources":
+        """
+        Return a copy of these resources with `amount` bytes added to the memory request (and the memory limit,
+        if there is one); used to account for memory-backed volumes, which are charged to the container
+        """
+        requests = dict(self._raw_requests)
+        limits = dict(self._raw_limits)
+        # If only the limit is set, Kubernetes would copy it into the request, so that's what we add to
+        requests["memory"] = format_memory(quantity_value(requests.get("memory", limits.get("memory", 0))) + amount)
+        if "memory" in limits:
+            limits["memory"] = format_memory(quantity_value(limits["memory"]) + amount)
+        return Resources(requests, limits or None)
+
+    @property
+    def qos_class(self) -> QoSClass:
+        if not self._raw_requests and not self._raw_limits:
+            return QoSClass.BestEffort
+
+        # If a limit is set but the request isn't, Kubernetes sets the request equal to the limit
+        for resource in ("cpu", "memory"):
+            if resource not in self._raw_limits:
+                return QoSClass.Burstable
+            limit = quantity_value(self._raw_limits[resource])
+            request = quantity_value(self._raw_requests.get(resource, self._raw_limits[resource]))
+            if request != limit:
+                return QoSClass.Burstable
+        return QoSClass.Guaranteed
@@ -0,0 +1,121 @@
+import math
+import typing as T
+
+from fireconfig import k8s
+from fireconfig.types import RolloutPreset
+from fireconfig.util import int_or_string
+
+# Kubernetes defaults, used when a deployment doesn't say otherwise
+_DEFAULT_MAX_SURGE = "25%"
+_DEFAULT_MAX_UNAVAILABLE = "25%"
+_DEFAULT_PROBE_PERIOD_SECONDS = 10
+
+# A rough guess at how long it takes to schedule a pod and start its containers, before any probes run
+_POD_START_SECONDS = 5
+
+
+class Rollout(T.NamedTuple):
+    max_surge: T.Union[int, str]
+    max_unavailable: T.Union[int, str]
+    min_ready_seconds: T.Optional[int] = None
+    progress_deadline_seconds: T.Optional[int] = None
+    revision_history_limit: T.Optional[int] = None
+
+    def build_spec_fields(self) -> T.Mapping[str, T.Any]:
+        fields: T.MutableMapping[str, T.Any] = {
+            "strategy": k8s.DeploymentStrategy(
+                type="RollingUpdate",
+                rolling_update=k8s.RollingUpdateDeployment(
+                    max_surge=int_or_string(self.max_surge),
+                    max_unavailable=int_or_string(self.max_unavailable),
+                ),
+            )
+        }
+        if self.min_ready_seconds is not None:
+            fields["min_ready_seconds"] = self.min_ready_seconds
+        if self.progress_deadline_seconds is not None:
+            fields["progress_deadline_seconds"] = self.progress_deadline_seconds
+        if self.revision_history_limit is not None:
+            fields["revision_history_limit"] = self.revision_history_limit
+        return fields
+
+
+DEFAULT_ROLLOUT = Rollout(max_surge=_DEFAULT_MAX_SURGE, max_unavailable=_DEFAULT_MAX_UNAVAILABLE)
+
+ROLLOUT_PRESETS: T.Mapping[RolloutPreset, Rollout] = {
+    # Bring up lots of new pods at once, and don't wait around once they're ready
+    RolloutPreset.Fast: Rollout(
+        max_surge="50%",
+        max_unavailable="25%",
+        min_ready_seconds=0,
+        progress_deadline_seconds=300,
+        revision_history_limit=3,
+    ),
+    # Replace pods one at a time, never dropping below the desired capacity
+    RolloutPreset.Conservative: Rollout(
+        max_surge=1,
+        max_unavailable=0,
+        min_ready_seconds=30,
+        progress_deadline_seconds=900,
+        revision_history_limit=10,
+    ),
+    # Bring up a full copy of the new pods before any of the old ones go away
+    RolloutPreset.BlueGreen: Rollout(
+        max_surge="100%",
+        max_unavailable=0,
+        min_ready_seconds=10,
+        progress_deadline_seconds=600,
+        revision_history_limit=3,
+    ),
+}
+
+
+def _resolve(v: T.Union[int, str], replicas: int, round_up: bool) -> int:
+    if isinstance(v, str) and v.endswith("%"):
+        scaled = replicas * int(v[:-1]) / 100
+        return math.ceil(scaled) if round_up else math.floor(scaled)
+    return int(v)
+
+
+def _probe_seconds(probe: T.Optional[T.Mapping[str, T.Any]]) -> int:
+    if not probe:
+        return 0
+    period = probe.get("periodSeconds", _DEFAULT_PROBE_PERIOD_SECONDS)
+    return probe.get("initialDelaySeconds", 0) + period * probe.get("successThreshold", 1)
+
+
+def estimate_rollout_seconds(depl: T.Mapping[str, T.Any], replicas: T.Optional[int] = None) -> int:
+    """
+    Estimate how long it takes to roll out new pods for a deployment (given as its JSON manifest).
+    This is a back-of-the-envelope number: the rollout proceeds in batches of `maxSurge + maxUnavailable`
+    pods, and each batch takes as long as it takes a pod to start up, pass its startup and readiness
+    probes, and then stay ready for `minReadySeconds`.  If the replica count is managed by an HPA, pass
+    in the HPA minimum as `replicas`.
+    """
+    spec = depl.get("spec", {})
+    if replicas is None:
+        replicas = spec.get("replicas", 1)
+    assert replicas is not None
+    if replicas <= 0:
+        return 0
+
+    rolling_update = spec.get("strategy", {}).get("rollingUpdate", {})
+    surge = _resolve(rolling_update.get("maxSurge", _DEFAULT_MAX_SURGE), replicas, round_up=True)
+    unavailable = _resolve(rolling_update.get("maxUnavailable", _DEFAULT_MAX_UNAVAILABLE), replicas, round_up=False)
+    batch_size = max(1, surge + unavailable)
+
+    containers = spec.get("template", {}).get("spec", {}).get("containers", [])
+    pod_ready_seconds = _POD_START_SECONDS + max(
+        (_probe_seconds(c.get("startupProbe")) + _probe_seconds(c.get("readinessProbe")) for c in containers),
+        default=0,
+    )
+    batch_seconds = pod_ready_seconds + spec.get("minReadySeconds", 0)
+
+    return math.ceil(replicas / batch_size) * batch_seconds
+
+
+def format_duration(seconds: int) -> str:
+    minutes, seconds = divmod(seconds, 60)
+    if minutes == 0:
+        return f"{seconds}s"
+    return f"{minutes}m{seconds:02}s"
@@ -0,0 +1,120 @@
+import typing as T
+
+from cdk8s import Chart
+
+from fireconfig import k8s
+from fireconfig.types import PodManagementPolicy
+from fireconfig.util import int_or_string
+from fireconfig.workload import ServicePort
+from fireconfig.workload import WorkloadBuilder
+from fireconfig.workload import build_service_ports
+
+
+class StatefulSetBuilder(WorkloadBuilder):
+    """
+    Builds a StatefulSet, along with the headless Service that governs it (which gives each pod a stable
+    DNS name).  Containers can mount per-pod storage with `VolumesBuilder.with_persistent_claim`.
+    """
+
+    def __init__(self, *, app_label: str, tag: T.Optional[str] = None):
+        super().__init__(app_label=app_label, tag=tag)
+
+        self._replicas: int = 1
+        self._pod_management_policy: T.Optional[PodManagementPolicy] = None
+        self._partition: T.Optional[int] = None
+        self._max_unavailable: T.Optional[T.Union[int, str]] = None
+        self._headless_service_name: str = f"{self._app_label}-headless"
+
+    @property
+    def headless_service_name(self) -> str:
+        return self._headless_service_name
+
+    def with_replicas(self, replicas: int) -> T.Self:
+        self._replicas = replicas
+        return self
+
+    def with_service(
+        self,
+        ports: T.Optional[T.Sequence[T.Union[int, ServicePort]]] = None,
+        *,
+        headless: bool = False,
+        **kwargs: T.Any,
+    ) -> T.Self:
+        """
+        Put a (non-headless) Service in front of the pods; the headless Service that governs the StatefulSet
+        is always created, so there's no need to ask for a second one.
+        """
+        if headless:
+            raise ValueError(f"StatefulSets already get a headless service ({self._headless_service_name})")
+        return super().with_service(ports, **kwargs)
+
+    def with_pod_management_policy(self, policy: PodManagementPolicy) -> T.Self:
+        """
+        `Parallel` launches (and terminates) all of the pods at once, instead of one at a time in order;
+        this makes scaling big StatefulSets much faster, but only works if pods don't depend on their
+        lower-numbered siblings being ready.
+        """
+        self._pod_management_policy = policy
+        return self
+
+    def with_rolling_update(
+        self,
+        *,
+        partition: T.Optional[int] = None,
+        max_unavailable: T.Optional[T.Union[int, str]] = None,
+    ) -> T.Self:
+        """
+        Only pods with an ordinal >= `partition` are updated when the pod template changes, which can be used
+        to stage (or canary) a rollout; `max_unavailable` allows more than one pod to be updated at a time.
+        """
+        self._partition = partition
+        self._max_unavailable = max_unavailable
+        return self
+
+    def _build(self, meta: k8s.ObjectMeta, chart: Chart) -> k8s.KubeStatefulSet:
+        template = self._build_pod_template(chart)
+        headless = self._build_headless_service(chart)
+        self._deps.append(headless)
+
+        optional: T.MutableMapping[str, T.Any] = {}
+        if self._pod_management_policy is not None:
+            optional["pod_management_policy"] = str(self._pod_management_policy)
+        if self._partition is not None or self._max_unavailable is not None:
+            optional["update_strategy"] = k8s.StatefulSetUpdateStrategy(
+                type="RollingUpdate",
+                rolling_update=k8s.RollingUpdateStatefulSetStrategy(
+                    partition=self._partition,
+                    max_unavailable=int_or_string(self._max_unavailable) if self._max_unavailable is not None else None,
+                ),
+            )
+        if claims := self._build_claim_templates():
+            optional["volume_claim_templates"] = claims
+
+        sts = k8s.KubeStatefulSet(
+            chart,
+            f"{self._tag}sts",
+            metadata=meta,
+            spec=k8s.StatefulSetSpec(
+                selector=k8s.LabelSelector(match_labels=self._selector),
+                service_name=headless.name,
+                replicas=self._replicas,
+                template=template,
+                **optional,
+            ),
+        )
+
+        self._add_pod_owner_env(sts)
+        return sts
+
+    def _build_headless_service(self, chart: Chart) -> k8s.KubeService:
+        ports = self._container_ports()
+        return k8s.KubeService(
+            chart,
+            f"{self._tag}headless-service",
+            metadata={"name": self._headless_service_name},
+            spec=k8s.ServiceSpec(
+                cluster_ip="None",
+                ports=build_service_ports(ports) or None,
+                selector=self._selector,
+            ),
+        )
@@ -22,7 +22,10 @@ class ChartSubgraph:
         return name
 
     def add_edge(self, s: DependencyVertex, t: DependencyVertex):
-        s_name = self.add_node(s)
+        # Objects can depend on objects in other charts (e.g., shared ConfigMaps in the global chart);
+        # those get an edge here, but the node itself belongs to the subgraph for its own chart
+        s_obj = T.cast(ApiObject, s.value)
+        s_name = self.add_node(s) if s_obj.chart.node.id == self._name else owned_name(s_obj)
         t_name = self.add_node(t)
         self._dag[s_name].append(t_name)
 
@@ -30,10 +33,13 @@ class ChartSubgraph:
         self._deleted_lines.add(ln)
 
     def nodes(self) -> T.List[T.Tuple[str, str]]:
-        return [(n, self._kinds[n]) for n in self._dag.keys()]
+        return [(n, self._kinds[n]) for n in self._dag.keys() if n in self._kinds]
 
     def edges(self) -> T.List[T.Tuple[str, str]]:
         return [(s, e) for s, ln in self._dag.items() for e in ln]
 
+    def __contains__(self, name: object) -> bool:
+        return name in self._kinds
+
     def deleted_lines(self) -> T.Iterable[str]:
         return self._deleted_lines
@@ -3,14 +3,15 @@ from enum import StrEnum
 
 class Capability(StrEnum):
     DEBUG = "SYS_PTRACE"
+    IPC_LOCK = "IPC_LOCK"
 
 
 class DownwardAPIField(StrEnum):
     NAME = "metadata.name"
     NAMESPACE = "metadata.namespace"
     UID = "metadata.uid"
-    ANNOTATION = "metadata.annotations[{}]"
-    LABEL = "metadata.labels[{}]"
+    ANNOTATION = "metadata.annotations['{}']"
+    LABEL = "metadata.labels['{}']"
     SERVICE_ACCOUNT_NAME = "spec.serviceAccountName"
     NODE_NAME = "spec.nodeName"
     HOST_IP = "status.hostIP"
@@ -19,7 +20,120 @@ class DownwardAPIField(StrEnum):
     POD_IPS = "status.podIPs"
 
 
+class ResourceField(StrEnum):
+    LIMITS_CPU = "limits.cpu"
+    LIMITS_MEMORY = "limits.memory"
+    LIMITS_EPHEMERAL_STORAGE = "limits.ephemeral-storage"
+    REQUESTS_CPU = "requests.cpu"
+    REQUESTS_MEMORY = "requests.memory"
+    REQUESTS_EPHEMERAL_STORAGE = "requests.ephemeral-storage"
+
+
 class TaintEffect(StrEnum):
     NoExecute = "NoExecute"
     NoSchedule = "NoSchedule"
     PreferNoSchedule = "PreferNoSchedule"
+
+
+class ScalingPolicyType(StrEnum):
+    Pods = "Pods"
+    Percent = "Percent"
+
+
+class ScalingPolicySelect(StrEnum):
+    Max = "Max"
+    Min = "Min"
+    Disabled = "Disabled"
+
+
+class TopologyKey(StrEnum):
+    Hostname = "kubernetes.io/hostname"
+    Zone = "topology.kubernetes.io/zone"
+    Region = "topology.kubernetes.io/region"
+
+
+class UnsatisfiableAction(StrEnum):
+    DoNotSchedule = "DoNotSchedule"
+    ScheduleAnyway = "ScheduleAnyway"
+
+
+class SelectorOperator(StrEnum):
+    In = "In"
+    NotIn = "NotIn"
+    Exists = "Exists"
+    DoesNotExist = "DoesNotExist"
+    Gt = "Gt"
+    Lt = "Lt"
+
+
+class RolloutPreset(StrEnum):
+    Fast = "fast"
+    Conservative = "conservative"
+    BlueGreen = "blue-green"
+
+
+class QoSClass(StrEnum):
+    Guaranteed = "Guaranteed"
+    Burstable = "Burstable"
+    BestEffort = "BestEffort"
+
+
+class ResourceProfile(StrEnum):
+    Guaranteed = "guaranteed"
+
+
+class HugePageSize(StrEnum):
+    Size2Mi = "2Mi"
+    Size1Gi = "1Gi"
+
+
+class StorageMedium(StrEnum):
+    Default = ""
+    Memory = "Memory"
+    HugePages = "HugePages"
+
+
+class Compression(StrEnum):
+    Uncompressed = ""
+    Gzip = "gz"
+    Zstd = "zst"
+
+
+class PodManagementPolicy(StrEnum):
+    OrderedReady = "OrderedReady"
+    Parallel = "Parallel"
+
+
+class AccessMode(StrEnum):
+    ReadWriteOnce = "ReadWriteOnce"
+    ReadOnlyMany = "ReadOnlyMany"
+    ReadWriteMany = "ReadWriteMany"
+    ReadWriteOncePod = "ReadWriteOncePod"
+
+
+class HostPathType(StrEnum):
+    Unchecked = ""
+    Directory = "Directory"
+    DirectoryOrCreate = "DirectoryOrCreate"
+    File = "File"
+    FileOrCreate = "FileOrCreate"
+    Socket = "Socket"
+    CharDevice = "CharDevice"
+    BlockDevice = "BlockDevice"
+
+
+class RestartPolicy(StrEnum):
+    Always = "Always"
+    OnFailure = "OnFailure"
+    Never = "Never"
+
+
+class ConcurrencyPolicy(StrEnum):
+    Allow = "Allow"
+    Forbid = "Forbid"
+    Replace = "Replace"
+
+
+class TrafficPolicy(StrEnum):
+    Cluster = "Cluster"
+    Local = "Local"
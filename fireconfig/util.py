@@ -1,9 +1,16 @@
+import hashlib
 import typing as T
 
+import simplejson as json
 from cdk8s import ApiObject
 from cdk8s import Chart
 from cdk8s import JsonPatch
 
+from fireconfig import k8s
+
+CONTENT_HASH_LENGTH = 10
+GLOBAL_CHART_NAME = "global"
+
 
 # cdk8s incorrectly adds namespaces to cluster-scoped objects, so this function corrects for that
 # (see https://github.com/cdk8s-team/cdk8s/issues/1618 and https://github.com/cdk8s-team/cdk8s/issues/1558)
@@ -53,3 +60,15 @@ def owned_name(obj: ApiObject) -> str:
     if prefix is None or is_cluster_scoped(obj.kind):
         prefix = obj.chart.node.id
     return prefix + "/" + obj.name
+
+
+def int_or_string(v: T.Union[int, str]) -> k8s.IntOrString:
+    if isinstance(v, str):
+        return k8s.IntOrString.from_string(v)
+    return k8s.IntOrString.from_number(v)
+
+
+def content_hash(data: T.Any) -> str:
+    # Stable across runs and key orderings, so the same data always produces the same object name
+    serialized = json.dumps(data, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()[:CONTENT_HASH_LENGTH]
@@ -1,23 +1,199 @@
 import typing as T
+from decimal import Decimal
 
 from cdk8s import ApiObject
 from cdk8s import Chart
 
 from fireconfig import k8s
+from fireconfig.configmap import ConfigMapData
+from fireconfig.configmap import compress
+from fireconfig.configmap import config_map_payload
+from fireconfig.configmap import hashable_data
+from fireconfig.configmap import shard_data
+from fireconfig.projected import ConfigMapSource
+from fireconfig.projected import ProjectedVolumeBuilder
+from fireconfig.resources import parse_quantity
+from fireconfig.resources import quantity_value
+from fireconfig.types import AccessMode
+from fireconfig.types import Compression
+from fireconfig.types import HostPathType
+from fireconfig.types import HugePageSize
+from fireconfig.types import StorageMedium
+from fireconfig.util import GLOBAL_CHART_NAME
+from fireconfig.util import content_hash
 
-VolumeDefsWithObject = T.Mapping[str, T.Tuple[T.Mapping[str, T.Any], T.Optional[ApiObject]]]
+VolumeDefsWithObject = T.Mapping[str, T.Tuple[T.Mapping[str, T.Any], T.Sequence[ApiObject]]]
 
 
 class VolumesBuilder:
     def __init__(self) -> None:
         self._volume_mounts: T.MutableMapping[str, str] = {}
-        self._config_map_data: T.MutableMapping[str, T.Mapping[str, str]] = {}
+        self._config_map_data: T.MutableMapping[str, ConfigMapData] = {}
+        self._immutable_config_maps: T.Set[str] = set()
+        self._shared_config_maps: T.Set[str] = set()
+        self._projected: T.MutableMapping[str, ProjectedVolumeBuilder] = {}
+        self._claim_templates: T.MutableMapping[str, k8s.KubePersistentVolumeClaimProps] = {}
+        self._empty_dirs: T.MutableMapping[str, T.Mapping[str, str]] = {}
+        self._host_paths: T.MutableMapping[str, T.Mapping[str, str]] = {}
+        self._hugepage_sizes: T.MutableMapping[str, HugePageSize] = {}
+        self._memory_backed_sizes: T.MutableMapping[str, Decimal] = {}
 
-    def with_config_map(self, vol_name: str, mount_path: str, data: T.Mapping[str, str]) -> T.Self:
+    def with_config_map(
+        self,
+        vol_name: str,
+        mount_path: str,
+        data: ConfigMapData,
+        immutable: bool = False,
+        shared: bool = False,
+    ) -> T.Self:
+        """
+        Mount a ConfigMap containing `data`.  If `immutable` is set, the ConfigMap is marked `immutable: true`
+        (so kubelets don't need to watch it) and its name is suffixed with a hash of its contents; changing the
+        data creates a new ConfigMap and rolls the pods that mount it, and the old one is removed.
+
+        If `shared` is set, the ConfigMap comes from a per-namespace pool in the global chart instead:
+        every package in the namespace that mounts identical data uses the same (immutable) ConfigMap.
+        """
         self._config_map_data[vol_name] = data
         self._volume_mounts[vol_name] = mount_path
+        for flag, vols in ((immutable, self._immutable_config_maps), (shared, self._shared_config_maps)):
+            if flag:
+                vols.add(vol_name)
+            else:
+                vols.discard(vol_name)
+        return self
+
+    def with_projected(self, vol_name: str, mount_path: str, projected: ProjectedVolumeBuilder) -> T.Self:
+        self._projected[vol_name] = projected
+        self._volume_mounts[vol_name] = mount_path
+        return self
+
+    def with_persistent_claim(
+        self,
+        vol_name: str,
+        mount_path: str,
+        size: str,
+        storage_class: T.Optional[str] = None,
+        access_modes: T.Sequence[AccessMode] = (AccessMode.ReadWriteOnce,),
+    ) -> T.Self:
+        """
+        Mount a per-pod PersistentVolumeClaim of `size`; these are created from the `volumeClaimTemplates`
+        of a StatefulSet, so they can only be used by containers in a `StatefulSetBuilder`.
+        """
+        self._claim_templates[vol_name] = k8s.KubePersistentVolumeClaimProps(
+            metadata=k8s.ObjectMeta(name=vol_name),
+            spec=k8s.PersistentVolumeClaimSpec(
+                access_modes=[str(m) for m in access_modes],
+                resources=k8s.ResourceRequirements(requests={"storage": k8s.Quantity.from_string(size)}),
+                storage_class_name=storage_class,
+            ),
+        )
+        self._volume_mounts[vol_name] = mount_path
+        return self
+
+    def build_claim_templates(
+        self, names: T.Optional[T.Iterable[str]] = None
+    ) -> T.Sequence[k8s.KubePersistentVolumeClaimProps]:
+        if names is None:
+            names = self._volume_mounts.keys()
+        return [self._claim_templates[name] for name in names if name in self._claim_templates]
+
+    def with_binary_config_map(
+        self,
+        vol_name: str,
+        mount_path: str,
+        data: T.Mapping[str, bytes],
+        compression: Compression = Compression.Uncompressed,
+        immutable: bool = False,
+        shared: bool = False,
+    ) -> T.Self:
+        """
+        Mount a ConfigMap containing binary `data` (stored in `binaryData`).  If `compression` is set, each
+        value is compressed and mounted with the matching extension (so `model.bin` shows up in the container
+        as `model.bin.gz` or `model.bin.zst`); the application is responsible for decompressing it.
+        `immutable` and `shared` work the same way as in `with_config_map`.
+        """
+        compressed = dict(compress(k, v, compression) for k, v in data.items())
+        return self.with_config_map(vol_name, mount_path, compressed, immutable=immutable, shared=shared)
+
+    def with_empty_dir(
+        self,
+        vol_name: str,
+        mount_path: str,
+        medium: StorageMedium = StorageMedium.Default,
+        size_limit: T.Optional[str] = None,
+    ) -> T.Self:
+        if medium == StorageMedium.HugePages:
+            raise ValueError(f"use with_hugepages for hugepages volume {vol_name}, so its page size is known")
+        empty_dir: T.MutableMapping[str, T.Any] = {}
+        if medium != StorageMedium.Default:
+            empty_dir["medium"] = str(medium)
+        if size_limit is not None:
+            empty_dir["sizeLimit"] = parse_quantity(size_limit)
+            if medium == StorageMedium.Memory:
+                self._memory_backed_sizes[vol_name] = quantity_value(size_limit)
+        self._empty_dirs[vol_name] = empty_dir
+        self._volume_mounts[vol_name] = mount_path
+        return self
+
+    def with_host_path(
+        self,
+        vol_name: str,
+        mount_path: str,
+        path: str,
+        path_type: HostPathType = HostPathType.Unchecked,
+    ) -> T.Self:
+        """Mount `path` from the node's filesystem; mostly useful for node agents running in a DaemonSet"""
+        host_path = {"path": path}
+        if path_type != HostPathType.Unchecked:
+            host_path["type"] = str(path_type)
+        self._host_paths[vol_name] = host_path
+        self._volume_mounts[vol_name] = mount_path
+        return self
+
+    def with_scratch(
+        self,
+        vol_name: str,
+        mount_path: str,
+        size_limit: T.Optional[str] = None,
+        in_memory: bool = False,
+    ) -> T.Self:
+        """
+        Mount a scratch (`emptyDir`) volume.  Files written to an in-memory (tmpfs) volume count against the
+        container's memory, so in-memory scratch volumes need a size limit, which gets added to the memory
+        request of the container that mounts the volume.  If several containers in a pod mount it, only the
+        first one (in `with_containers` order) is charged for it.
+        """
+        if in_memory and size_limit is None:
+            raise ValueError(f"in-memory scratch volume {vol_name} needs a size_limit")
+        medium = StorageMedium.Memory if in_memory else StorageMedium.Default
+        return self.with_empty_dir(vol_name, mount_path, medium=medium, size_limit=size_limit)
+
+    def memory_backed_volumes(self, names: T.Optional[T.Iterable[str]] = None) -> T.Set[str]:
+        if names is None:
+            names = self._volume_mounts.keys()
+        return {name for name in names if name in self._memory_backed_sizes}
+
+    def memory_backed_size(self, names: T.Optional[T.Iterable[str]] = None) -> Decimal:
+        if names is None:
+            names = self._volume_mounts.keys()
+        return sum((self._memory_backed_sizes.get(name, Decimal(0)) for name in names), Decimal(0))
+
+    def with_hugepages(self, vol_name: str, mount_path: str, page_size: HugePageSize) -> T.Self:
+        """
+        Mount a hugetlbfs volume backed by pages of `page_size`; any container that mounts this volume
+        also needs to request hugepages of the same size (see `ContainerBuilder.with_hugepages`).
+        """
+        self._empty_dirs[vol_name] = {"medium": f"{StorageMedium.HugePages}-{page_size}"}
+        self._hugepage_sizes[vol_name] = page_size
+        self._volume_mounts[vol_name] = mount_path
         return self
 
+    def hugepage_sizes(self, names: T.Optional[T.Iterable[str]] = None) -> T.Set[HugePageSize]:
+        if names is None:
+            names = self._volume_mounts.keys()
+        return {self._hugepage_sizes[name] for name in names if name in self._hugepage_sizes}
+
     def get_path_to_config_map(self, vol_name: str, path_name: str) -> str:
         assert vol_name in self._config_map_data and path_name in self._config_map_data[vol_name]
         path = self._volume_mounts[vol_name] + "/" + path_name
@@ -33,27 +209,122 @@ class VolumesBuilder:
         if names is None:
             names = self._volume_mounts.keys()
 
-        volumes = {}
+        volumes: T.MutableMapping[str, T.Tuple[T.Mapping[str, T.Any], T.Sequence[ApiObject]]] = {}
         for vol_name, data in self._config_map_data.items():
             if vol_name not in names:
                 continue
 
-            cm = k8s.KubeConfigMap(chart, vol_name, data=data)
-            volumes[vol_name] = (
-                {
-                    "name": vol_name,
-                    "configMap": {
-                        "name": cm.name,
-                        "items": [
-                            {
-                                "key": cm_entry,
-                                "path": cm_entry,
-                            }
-                            for cm_entry in data
-                        ],
-                    },
-                },
-                cm,
+            sources, cms = _config_map_sources(
+                chart,
+                vol_name,
+                data,
+                immutable=vol_name in self._immutable_config_maps,
+                shared=vol_name in self._shared_config_maps,
             )
+            if len(sources) == 1:
+                volumes[vol_name] = ({"name": vol_name, "configMap": sources[0]}, cms)
+            else:
+                # sharded ConfigMaps are all mounted together so the container still sees one directory
+                defn = {"name": vol_name, "projected": {"sources": [{"configMap": src} for src in sources]}}
+                volumes[vol_name] = (defn, cms)
+
+        for vol_name, projected in self._projected.items():
+            if vol_name not in names:
+                continue
+            volumes[vol_name] = _build_projected_volume(chart, vol_name, projected)
+
+        for vol_name, empty_dir in self._empty_dirs.items():
+            if vol_name not in names:
+                continue
+            volumes[vol_name] = ({"name": vol_name, "emptyDir": empty_dir}, [])
+
+        for vol_name, host_path in self._host_paths.items():
+            if vol_name not in names:
+                continue
+            volumes[vol_name] = ({"name": vol_name, "hostPath": host_path}, [])
 
         return volumes
+
+
+def _build_config_map(
+    chart: Chart, cm_id: str, data: ConfigMapData, immutable: bool, shared: bool
+) -> k8s.KubeConfigMap:
+    if shared:
+        return shared_config_map(chart, data)
+    if immutable:
+        cm_id = f"{cm_id}-{content_hash(hashable_data(data))}"
+        return k8s.KubeConfigMap(chart, cm_id, immutable=True, **config_map_payload(data))
+    return k8s.KubeConfigMap(chart, cm_id, **config_map_payload(data))
+
+
+def _config_map_sources(
+    chart: Chart,
+    cm_id: str,
+    data: ConfigMapData,
+    *,
+    immutable: bool = False,
+    shared: bool = False,
+    subdir: T.Optional[str] = None,
+) -> T.Tuple[T.List[T.Mapping[str, T.Any]], T.List[k8s.KubeConfigMap]]:
+    """
+    Build the ConfigMap(s) holding `data`, along with the `configMap` volume sources that reference them.
+    Data that's too big for a single ConfigMap gets split up across several of them.
+    """
+    shards = shard_data(data)
+    cms = [
+        _build_config_map(chart, cm_id if len(shards) == 1 else f"{cm_id}-{i}", shard, immutable, shared)
+        for i, shard in enumerate(shards)
+    ]
+    sources: T.List[T.Mapping[str, T.Any]] = [
+        {"name": cm.name, "items": _config_map_items(shard, subdir)} for cm, shard in zip(cms, shards)
+    ]
+    return sources, cms
+
+
+def _build_projected_volume(
+    chart: Chart,
+    vol_name: str,
+    projected: ProjectedVolumeBuilder,
+) -> T.Tuple[T.Mapping[str, T.Any], T.Sequence[ApiObject]]:
+    sources: T.List[T.Mapping[str, T.Any]] = []
+    objs: T.List[ApiObject] = []
+    for src in projected.sources:
+        if isinstance(src, ConfigMapSource):
+            cm_sources, cms = _config_map_sources(
+                chart, f"{vol_name}-{src.name}", src.data, immutable=src.immutable, subdir=src.subdir
+            )
+            sources.extend({"configMap": cm_src} for cm_src in cm_sources)
+            objs.extend(cms)
+        else:
+            sources.append(src)
+
+    defn: T.MutableMapping[str, T.Any] = {"sources": sources}
+    if projected.default_mode is not None:
+        defn["defaultMode"] = projected.default_mode
+    return {"name": vol_name, "projected": defn}, objs
+
+
+def _config_map_items(data: ConfigMapData, subdir: T.Optional[str] = None) -> T.List[T.Mapping[str, str]]:
+    return [{"key": cm_entry, "path": cm_entry if subdir is None else f"{subdir}/{cm_entry}"} for cm_entry in data]
+
+
+def shared_config_map(chart: Chart, data: ConfigMapData) -> k8s.KubeConfigMap:
+    """
+    Return the pooled ConfigMap holding `data` for `chart`'s namespace, creating it if this is the first
+    time that data has been seen.  Pooled ConfigMaps live in the global chart (or in `chart` itself, if
+    it isn't part of a fireconfig app) and are named by content hash, so they're immutable.
+    """
+    app = chart.node.scope
+    pool = T.cast(T.Optional[Chart], app.node.try_find_child(GLOBAL_CHART_NAME) if app else None) or chart
+    h = content_hash(hashable_data(data))
+    cm_id = f"{chart.namespace}-shared-{h}"
+
+    if (cm := pool.node.try_find_child(cm_id)) is not None:
+        return T.cast(k8s.KubeConfigMap, cm)
+    return k8s.KubeConfigMap(
+        pool,
+        cm_id,
+        metadata=k8s.ObjectMeta(name=f"shared-{h}", namespace=chart.namespace),
+        immutable=True,
+        **config_map_payload(data),
+    )
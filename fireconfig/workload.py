@@ -0,0 +1,375 @@
+import typing as T
+
+from cdk8s import ApiObject
+from cdk8s import Chart
+from cdk8s import JsonPatch
+
+from fireconfig import k8s
+from fireconfig.affinity import Affinity
+from fireconfig.container import ContainerBuilder
+from fireconfig.object import ObjectBuilder
+from fireconfig.resources import pod_qos_class
+from fireconfig.types import QoSClass
+from fireconfig.types import RestartPolicy
+from fireconfig.types import SelectorOperator
+from fireconfig.types import TaintEffect
+from fireconfig.types import TopologyKey
+from fireconfig.types import TrafficPolicy
+from fireconfig.types import UnsatisfiableAction
+from fireconfig.util import int_or_string
+from fireconfig.volume import VolumeDefsWithObject
+
+_APP_LABEL_KEY = "app.kubernetes.io/name"
+_TOPOLOGY_MODE_ANNOTATION = "service.kubernetes.io/topology-mode"
+
+
+class ServicePort(T.NamedTuple):
+    """
+    A named service port; `app_protocol` (e.g., "kubernetes.io/h2c" for gRPC) tells L7-aware proxies
+    and meshes how to route traffic to it
+    """
+
+    port: int
+    name: str
+    app_protocol: T.Optional[str] = None
+    target_port: T.Optional[T.Union[int, str]] = None
+
+    def build(self) -> k8s.ServicePort:
+        target_port = self.port if self.target_port is None else self.target_port
+        return k8s.ServicePort(
+            port=self.port,
+            name=self.name,
+            app_protocol=self.app_protocol,
+            target_port=int_or_string(target_port),
+        )
+
+
+def build_service_ports(ports: T.Sequence[T.Union[int, ServicePort]]) -> T.List[k8s.ServicePort]:
+    # Kubernetes requires every port to be named when a Service has more than one, so plain port numbers
+    # get a generated name in that case
+    named = len(ports) > 1
+    return [
+        p.build()
+        if isinstance(p, ServicePort)
+        else k8s.ServicePort(
+            port=p,
+            name=f"port-{p}" if named else None,
+            target_port=k8s.IntOrString.from_number(p),
+        )
+        for p in ports
+    ]
+
+
+class WorkloadBuilder(ObjectBuilder):
+    """
+    Everything that's common to objects that run pods (deployments, statefulsets, etc): the pod template,
+    scheduling constraints, and the service account and service that go along with the pods.
+    """
+
+    def __init__(self, *, app_label: str, tag: T.Optional[str] = None):
+        self._selector = {_APP_LABEL_KEY: app_label}
+        super().__init__(labels=self._selector)
+
+        self._app_label = app_label
+        self._tag = "" if tag is None else f"{tag}-"
+
+        self._pod_annotations: T.MutableMapping[str, str] = {}
+        self._pod_labels: T.MutableMapping[str, str] = dict(self._selector)
+        self._containers: T.List[ContainerBuilder] = []
+        self._latency_critical: bool = False
+        self._node_selector: T.Optional[T.Mapping[str, str]] = None
+        self._affinity = Affinity()
+        self._topology_spread: T.List[k8s.TopologySpreadConstraint] = []
+        self._service_account_role: T.Optional[str] = None
+        self._service_account_role_is_cluster_role: bool = False
+        self._service: bool = False
+        self._service_name: str = f"{self._app_label}-svc"
+        self._service_ports: T.Optional[T.Sequence[T.Union[int, ServicePort]]] = None
+        self._service_headless: bool = False
+        self._service_internal_traffic_policy: T.Optional[TrafficPolicy] = None
+        self._service_topology_aware: bool = False
+        self._service_session_affinity_seconds: T.Optional[int] = None
+        self._tolerations: T.List[T.Tuple[str, str, TaintEffect]] = []
+        self._priority_class: T.Optional[str] = None
+        self._restart_policy: T.Optional[RestartPolicy] = None
+
+    @property
+    def service_name(self) -> str:
+        return self._service_name
+
+    def with_pod_annotation(self, key: str, value: str) -> T.Self:
+        self._pod_annotations[key] = value
+        return self
+
+    def with_pod_label(self, key: str, value: str) -> T.Self:
+        self._pod_labels[key] = value
+        return self
+
+    def with_containers(self, *containers: ContainerBuilder) -> T.Self:
+        self._containers.extend(containers)
+        return self
+
+    @property
+    def qos_class(self) -> QoSClass:
+        self._assign_memory_backed_volumes()
+        return pod_qos_class(c.qos_class for c in self._containers)
+
+    def with_latency_critical(self) -> T.Self:
+        """Mark this workload as latency-critical; building it fails unless its pods get the Guaranteed QoS class"""
+        self._latency_critical = True
+        return self
+
+    def with_node_selector(self, key: str, value: str) -> T.Self:
+        self._node_selector = {key: value}
+        return self
+
+    def with_node_affinity(
+        self,
+        key: str,
+        values: T.Optional[T.Sequence[str]] = None,
+        operator: SelectorOperator = SelectorOperator.In,
+        weight: T.Optional[int] = None,
+    ) -> T.Self:
+        """
+        Constrain which nodes the pods can run on; if `weight` is set, this is a preference instead of
+        a requirement.  All required node affinities must be satisfied together.
+        """
+        self._affinity.add_node_affinity(key, operator, values, weight)
+        return self
+
+    def with_pod_anti_affinity(
+        self,
+        topology_key: str = TopologyKey.Hostname,
+        labels: T.Optional[T.Mapping[str, str]] = None,
+        weight: T.Optional[int] = 100,
+    ) -> T.Self:
+        """
+        Keep pods apart from other pods matching `labels` (by default, the other replicas of this
+        workload) in the same topology domain.  By default this is a (heavily-weighted) preference;
+        set `weight=None` to make it a hard requirement.
+        """
+        self._affinity.add_pod_anti_affinity(topology_key, labels or self._selector, weight)
+        return self
+
+    def with_topology_spread(
+        self,
+        topology_key: str = TopologyKey.Zone,
+        max_skew: int = 1,
+        when_unsatisfiable: UnsatisfiableAction = UnsatisfiableAction.ScheduleAnyway,
+        min_domains: T.Optional[int] = None,
+    ) -> T.Self:
+        self._topology_spread.append(
+            k8s.TopologySpreadConstraint(
+                max_skew=max_skew,
+                topology_key=topology_key,
+                when_unsatisfiable=when_unsatisfiable,
+                label_selector=k8s.LabelSelector(match_labels=self._selector),
+                min_domains=min_domains,
+            )
+        )
+        return self
+
+    def with_service(
+        self,
+        ports: T.Optional[T.Sequence[T.Union[int, ServicePort]]] = None,
+        *,
+        headless: bool = False,
+        internal_traffic_policy: T.Optional[TrafficPolicy] = None,
+        topology_aware: bool = False,
+        session_affinity_seconds: T.Optional[int] = None,
+    ) -> T.Self:
+        """
+        Put a Service in front of the pods (by default, on all of the container ports).
+
+        A `headless` service skips kube-proxy and resolves to the pod IPs directly, so that clients with
+        long-lived connections (e.g., gRPC) can balance requests across pods themselves instead of getting
+        pinned to whichever pod kube-proxy picked.  The remaining options only apply to non-headless
+        services: `internal_traffic_policy=Local` keeps traffic on the client's node, `topology_aware`
+        prefers endpoints in the client's zone, and `session_affinity_seconds` routes each client IP to the
+        same pod for the given time.
+        """
+        if headless and (internal_traffic_policy is not None or topology_aware or session_affinity_seconds is not None):
+            raise ValueError("headless services don't go through kube-proxy, so they can't set routing options")
+        if topology_aware and internal_traffic_policy == TrafficPolicy.Local:
+            raise ValueError("topology-aware routing is ignored when the internal traffic policy is Local")
+
+        self._service = True
+        self._service_ports = ports
+        self._service_headless = headless
+        self._service_internal_traffic_policy = internal_traffic_policy
+        self._service_topology_aware = topology_aware
+        self._service_session_affinity_seconds = session_affinity_seconds
+        return self
+
+    def with_service_account_and_role_binding(self, role_name: str, is_cluster_role: bool = False) -> T.Self:
+        self._service_account_role = role_name
+        self._service_account_role_is_cluster_role = is_cluster_role
+        return self
+
+    def with_toleration(self, key: str, value: str = "", effect: TaintEffect = TaintEffect.NoExecute) -> T.Self:
+        self._tolerations.append((key, value, effect))
+        return self
+
+    def with_priority_class(self, priority_class: str) -> T.Self:
+        self._priority_class = priority_class
+        return self
+
+    def _build_pod_template(self, chart: Chart) -> k8s.PodTemplateSpec:
+        """
+        Build the pod template, along with all of the objects the pods need (service account, service,
+        ConfigMaps, etc.); the latter are added as dependencies of the workload.
+        """
+        self._assign_memory_backed_volumes()
+        if self._latency_critical and self.qos_class != QoSClass.Guaranteed:
+            raise ValueError(
+                f"workload {self._app_label} is latency-critical, but its pods would have the {self.qos_class} "
+                "QoS class instead of Guaranteed; use with_resources(profile='guaranteed', ...) on all containers"
+            )
+
+        pod_meta: T.MutableMapping[str, T.Any] = {}
+        if self._pod_annotations:
+            pod_meta["annotations"] = self._pod_annotations
+        pod_meta["labels"] = self._pod_labels
+
+        optional: T.MutableMapping[str, T.Any] = {}
+        if self._node_selector is not None:
+            optional["node_selector"] = self._node_selector
+        if affinity := self._affinity.build():
+            optional["affinity"] = affinity
+        if self._topology_spread:
+            optional["topology_spread_constraints"] = self._topology_spread
+
+        if self._service_account_role is not None:
+            sa = self._build_service_account(chart)
+            rb = self._build_role_binding_for_service_account(
+                chart,
+                sa,
+                self._service_account_role,
+                self._service_account_role_is_cluster_role,
+            )
+            self._deps.append(sa)
+            self._deps.append(rb)
+            optional["service_account_name"] = sa.name
+
+        if self._service:
+            self._build_service(chart)
+
+        if len(self._tolerations) > 0:
+            optional["tolerations"] = [{"key": t[0], "value": t[1], "effect": t[2]} for t in self._tolerations]
+        if self._priority_class is not None:
+            optional["priority_class_name"] = self._priority_class
+        if self._restart_policy is not None:
+            optional["restart_policy"] = str(self._restart_policy)
+
+        if volumes := self._build_pod_volumes(chart):
+            optional["volumes"] = volumes
+
+        return k8s.PodTemplateSpec(
+            metadata=k8s.ObjectMeta(**pod_meta),
+            spec=k8s.PodSpec(
+                containers=[c.build() for c in self._containers],
+                **optional,
+            ),
+        )
+
+    def _assign_memory_backed_volumes(self):
+        # The pod only uses the memory for a memory-backed volume once, no matter how many containers mount
+        # it, so it's charged to the first container that does
+        charged: T.Set[str] = set()
+        for c in self._containers:
+            vols = c.memory_backed_volumes()
+            c.set_uncharged_volumes(vols & charged)
+            charged |= vols
+
+    def _build_pod_volumes(self, chart: Chart) -> T.List[T.Mapping[str, T.Any]]:
+        vols: VolumeDefsWithObject = dict()
+        for c in self._containers:
+            vols = {**vols, **c.build_volumes(chart)}
+            for cm in c.build_env_config_map(chart):
+                if cm not in self._deps:
+                    self._deps.append(cm)
+
+        volumes = []
+        for defn, objs in vols.values():
+            volumes.append(defn)
+            self._deps.extend(objs)
+        return volumes
+
+    def _build_claim_templates(self) -> T.List[k8s.KubePersistentVolumeClaimProps]:
+        claims: T.MutableMapping[T.Optional[str], k8s.KubePersistentVolumeClaimProps] = {}
+        for c in self._containers:
+            claims.update(
+                (claim.metadata.name if claim.metadata else None, claim) for claim in c.build_claim_templates()
+            )
+        return list(claims.values())
+
+    def _add_pod_env(self, obj: ApiObject, name: str, entry: T.Mapping[str, T.Any], template_path: str):
+        # the containers (and their env lists) only exist after the object is built, so we patch the env in
+        for i in range(len(self._containers)):
+            obj.add_json_patch(JsonPatch.add(f"{template_path}/spec/containers/{i}/env/-", {"name": name, **entry}))
+
+    def _add_pod_owner_env(self, obj: ApiObject, template_path: str = "/spec/template"):
+        self._add_pod_env(obj, "POD_OWNER", {"value": obj.name}, template_path)
+
+    def _container_ports(self) -> T.List[int]:
+        return [p for c in self._containers for p in c.ports]
+
+    # TODO maybe move these into separate files at some point?
+    def _build_service_account(self, chart: Chart) -> k8s.KubeServiceAccount:
+        return k8s.KubeServiceAccount(chart, f"{self._tag}sa")
+
+    def _build_service(self, chart: Chart) -> k8s.KubeService:
+        if self._service_ports is None:
+            self._service_ports = self._container_ports()
+        assert self._service_ports
+
+        meta: T.MutableMapping[str, T.Any] = {"name": self._service_name}
+        if self._service_topology_aware:
+            meta["annotations"] = {_TOPOLOGY_MODE_ANNOTATION: "Auto"}
+
+        optional: T.MutableMapping[str, T.Any] = {}
+        if self._service_headless:
+            optional["cluster_ip"] = "None"
+        if self._service_internal_traffic_policy is not None:
+            optional["internal_traffic_policy"] = str(self._service_internal_traffic_policy)
+        if self._service_session_affinity_seconds is not None:
+            optional["session_affinity"] = "ClientIP"
+            optional["session_affinity_config"] = k8s.SessionAffinityConfig(
+                client_ip=k8s.ClientIpConfig(timeout_seconds=self._service_session_affinity_seconds)
+            )
+
+        return k8s.KubeService(
+            chart,
+            "service",
+            metadata=k8s.ObjectMeta(**meta),
+            spec=k8s.ServiceSpec(
+                ports=build_service_ports(self._service_ports),
+                selector=self._selector,
+                **optional,
+            ),
+        )
+
+    def _build_role_binding_for_service_account(
+        self,
+        chart: Chart,
+        service_account: k8s.KubeServiceAccount,
+        role_name: str,
+        is_cluster_role: bool,
+    ) -> T.Union[k8s.KubeClusterRoleBinding, k8s.KubeRoleBinding]:
+        subjects = [
+            k8s.Subject(
+                kind="ServiceAccount",
+                name=service_account.name,
+                namespace=chart.namespace,
+            )
+        ]
+        role_ref = k8s.RoleRef(
+            api_group="rbac.authorization.k8s.io",
+            kind="ClusterRole" if is_cluster_role else "Role",
+            name=role_name,
+        )
+
+        if is_cluster_role:
+            return k8s.KubeClusterRoleBinding(chart, f"{self._tag}crb", subjects=subjects, role_ref=role_ref)
+        else:
+            return k8s.KubeRoleBinding(chart, f"{self._tag}rb", subjects=subjects, role_ref=role_ref)
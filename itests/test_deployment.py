@@ -56,3 +56,72 @@ def test_deployment():
         # the resulting dag file has a blank newline which gets stripped by pre-commit,
         # so compare everything except for that very last character
         assert dag[:-1] == f.read()
+
+
+def test_deployment_graph():
+    graph = fire.compile_graph({"the-namespace": [FcTestPackage()]})
+
+    assert graph.reverse_dependencies("the-namespace/fc-test-package-the-volume-name") == [
+        "the-namespace/fc-test-package-depl"
+    ]
+    assert "the-namespace/fc-test-package-depl" in graph.blast_radius("global/the-namespace")
+
+
+def test_deployment_plan():
+    plan = fire.compile_plan({"the-namespace": [FcTestPackage()]}, cdk8s_outdir=OUTPUT_DIR)
+
+    assert not plan.changed()
+    depl = next(r for r in plan.resources if r.owned_name == "the-namespace/fc-test-package-depl")
+    assert depl.kind == "Deployment"
+    assert depl.chart == "fc-test-package"
+    assert depl.state == "Unchanged"
+    assert depl.depth == 1
+    assert "the-namespace/fc-test-package-sa" in depl.dependencies
+
+
+def test_deployment_owned_fields():
+    class ScaledPackage(FcTestPackage):
+        def __init__(self):
+            self._depl = _make_deployment().with_replicas(5)
+
+    ScaledPackage.__name__ = FcTestPackage.__name__
+    pkgs = {"the-namespace": [ScaledPackage()]}
+
+    _, diff = fire.compile(pkgs, cdk8s_outdir=OUTPUT_DIR, dry_run=True)
+    assert "replicas" in diff
+
+    _, diff = fire.compile(
+        pkgs, cdk8s_outdir=OUTPUT_DIR, dry_run=True, owned_fields=fire.OwnedFields().with_hpa_replicas()
+    )
+    assert not diff
+
+
+def test_deployment_plan_pages(tmp_path):
+    (tmp_path / "page-3.md").write_text("stale")
+    dag, _ = fire.compile(
+        {"the-namespace": [FcTestPackage()]},
+        cdk8s_outdir=OUTPUT_DIR,
+        dry_run=True,
+        plan_pages_dir=str(tmp_path),
+    )
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["page-1.md"]
+    page = (tmp_path / "page-1.md").read_text()
+    assert page.startswith("### Plan (page 1 of 1)")
+    assert dag in page
+
+
+def test_deployment_shared_config_map():
+    def make_package(name):
+        volumes = fire.VolumesBuilder().with_config_map("cfg", "/config", {"shared.yml": "foo"}, shared=True)
+        depl = fire.DeploymentBuilder(app_label=name).with_containers(
+            fire.ContainerBuilder(name="c", image="test:latest").with_volumes(volumes)
+        )
+        return type(name, (FcTestPackage,), {"__init__": lambda self: setattr(self, "_depl", depl)})()
+
+    graph = fire.compile_graph({"the-namespace": [make_package("Pkg1"), make_package("Pkg2")]})
+
+    shared = [n for n in graph.nodes() if graph.kind(n) == "ConfigMap"]
+    assert len(shared) == 1
+    assert graph.chart(shared[0]) == "global"
+    assert graph.reverse_dependencies(shared[0]) == ["the-namespace/pkg1-depl", "the-namespace/pkg2-depl"]
@@ -0,0 +1,237 @@
+import pytest
+from cdk8s import App
+from cdk8s import Chart
+
+import fireconfig as fire
+from fireconfig.types import Capability
+from fireconfig.types import DownwardAPIField
+from fireconfig.types import HugePageSize
+from fireconfig.types import QoSClass
+from fireconfig.types import ResourceField
+from fireconfig.types import StorageMedium
+
+
+def _pod_volumes(*containers):
+    chart = Chart(App(), "pkg", namespace="ns", disable_resource_name_hashes=True)
+    fire.DeploymentBuilder(app_label="app").with_containers(*containers).build(chart)
+    pod_spec = next(o.to_json() for o in chart.api_objects if o.kind == "Deployment")["spec"]["template"]["spec"]
+    return {v["name"]: v for v in pod_spec["volumes"]}
+
+
+def test_probes():
+    container = (
+        fire.ContainerBuilder("c", "img")
+        .with_ports(8080, 9090)
+        .with_readiness_probe()
+        .with_liveness_probe(fire.HttpCheck("/livez"), initial_delay_seconds=15)
+        .with_startup_probe(fire.GrpcCheck(port=9090, service="health"), failure_threshold=120)
+        .build()
+    )
+
+    assert container.readiness_probe.tcp_socket.port.value == 8080
+    assert container.readiness_probe.period_seconds == 5
+
+    assert container.liveness_probe.http_get.path == "/livez"
+    assert container.liveness_probe.http_get.port.value == 8080
+    assert container.liveness_probe.initial_delay_seconds == 15
+    assert container.liveness_probe.period_seconds == 10
+
+    assert container.startup_probe.grpc.port == 9090
+    assert container.startup_probe.grpc.service == "health"
+    assert container.startup_probe.failure_threshold == 120
+
+
+def test_exec_probe():
+    container = fire.ContainerBuilder("c", "img").with_readiness_probe(fire.ExecCheck(["/ready.sh"])).build()
+    assert container.readiness_probe.exec.command == ["/ready.sh"]
+
+
+def test_probe_without_ports():
+    with pytest.raises(ValueError):
+        fire.ContainerBuilder("c", "img").with_readiness_probe().build()
+
+
+def test_guaranteed_resource_profile():
+    container = fire.ContainerBuilder("c", "img").with_resources(profile="guaranteed", cpu=4, memory="8Gi")
+    built = container.build()
+
+    assert container.qos_class == QoSClass.Guaranteed
+    assert built.resources.requests["cpu"].value == 4
+    assert built.resources.limits["memory"].value == "8Gi"
+
+
+@pytest.mark.parametrize("cpu", ["500m", "1.5", 0])
+def test_guaranteed_resource_profile_needs_whole_cpus(cpu):
+    with pytest.raises(ValueError):
+        fire.ContainerBuilder("c", "img").with_resources(profile="guaranteed", cpu=cpu, memory="1Gi")
+
+
+@pytest.mark.parametrize(
+    "requests,limits,expected",
+    [
+        (None, None, QoSClass.BestEffort),
+        ({"cpu": 1}, None, QoSClass.Burstable),
+        (None, {"cpu": "2", "memory": "1Gi"}, QoSClass.Guaranteed),
+        ({"cpu": "2000m", "memory": "1024Mi"}, {"cpu": 2, "memory": "1Gi"}, QoSClass.Guaranteed),
+        ({"cpu": "1", "memory": "1Gi"}, {"cpu": 2, "memory": "1Gi"}, QoSClass.Burstable),
+    ],
+)
+def test_qos_class(requests, limits, expected):
+    container = fire.ContainerBuilder("c", "img")
+    if requests is not None or limits is not None:
+        container.with_resources(requests=requests, limits=limits)
+    assert container.qos_class == expected
+
+
+def test_hugepages():
+    volumes = (
+        fire.VolumesBuilder()
+        .with_hugepages("hp", "/hugepages", HugePageSize.Size2Mi)
+        .with_empty_dir("shm", "/dev/shm", medium=StorageMedium.Memory, size_limit="1Gi")
+    )
+    container = (
+        fire.ContainerBuilder("c", "img")
+        .with_resources(requests={"memory": "1Gi"})
+        .with_hugepages(HugePageSize.Size2Mi, "512Mi")
+        .with_security_context(Capability.IPC_LOCK)
+        .with_volumes(volumes)
+    )
+    built = container.build()
+
+    assert built.resources.limits["hugepages-2Mi"].value == "512Mi"
+    assert built.resources.requests["hugepages-2Mi"].value == "512Mi"
+    assert built.resources.requests["memory"].value == "2Gi"
+    assert built.security_context.capabilities.add == ["IPC_LOCK"]
+
+    vols = _pod_volumes(container)
+    assert vols["hp"] == {"name": "hp", "emptyDir": {"medium": "HugePages-2Mi"}}
+    assert vols["shm"] == {"name": "shm", "emptyDir": {"medium": "Memory", "sizeLimit": "1Gi"}}
+
+
+def test_hugepages_volume_requires_request():
+    with pytest.raises(ValueError):
+        fire.VolumesBuilder().with_empty_dir("hp", "/hugepages", medium=StorageMedium.HugePages)
+
+    volumes = fire.VolumesBuilder().with_hugepages("hp", "/hugepages", HugePageSize.Size1Gi)
+    container = fire.ContainerBuilder("c", "img").with_hugepages(HugePageSize.Size2Mi, "512Mi").with_volumes(volumes)
+    with pytest.raises(ValueError):
+        container.build()
+
+
+def test_in_memory_scratch_counts_towards_memory():
+    volumes = (
+        fire.VolumesBuilder()
+        .with_scratch("tmp", "/tmp", size_limit="512Mi", in_memory=True)
+        .with_scratch("cache", "/cache", size_limit="10Gi")
+    )
+    container = (
+        fire.ContainerBuilder("c", "img")
+        .with_resources(profile="guaranteed", cpu=1, memory="1Gi")
+        .with_volumes(volumes)
+    )
+    built = container.build()
+
+    assert built.resources.requests["memory"].value == "1536Mi"
+    assert built.resources.limits["memory"].value == "1536Mi"
+
+    vols = _pod_volumes(container)
+    assert vols["tmp"] == {"name": "tmp", "emptyDir": {"medium": "Memory", "sizeLimit": "512Mi"}}
+    assert vols["cache"] == {"name": "cache", "emptyDir": {"sizeLimit": "10Gi"}}
+
+    only_disk = fire.ContainerBuilder("c", "img").with_volumes(volumes, ["cache"]).build()
+    assert only_disk.resources is None
+
+    with pytest.raises(ValueError):
+        fire.VolumesBuilder().with_scratch("tmp", "/tmp", in_memory=True)
+
+
+def test_in_memory_scratch_with_only_limits():
+    volumes = fire.VolumesBuilder().with_scratch("tmp", "/tmp", size_limit="512Mi", in_memory=True)
+    container = (
+        fire.ContainerBuilder("c", "img").with_resources(limits={"cpu": 2, "memory": "1Gi"}).with_volumes(volumes)
+    )
+    built = container.build()
+
+    assert built.resources.requests["memory"].value == "1536Mi"
+    assert built.resources.limits["memory"].value == "1536Mi"
+    assert container.qos_class == QoSClass.Guaranteed
+
+    no_resources = fire.ContainerBuilder("c", "img").with_volumes(volumes)
+    assert no_resources.qos_class == QoSClass.Burstable
+    assert fire.DeploymentBuilder(app_label="app").with_containers(no_resources).qos_class == QoSClass.Burstable
+
+
+def test_shared_in_memory_scratch_is_charged_once():
+    volumes = fire.VolumesBuilder().with_scratch("shm", "/dev/shm", size_limit="1Gi", in_memory=True)
+    containers = [
+        fire.ContainerBuilder(name, "img")
+        .with_resources(profile="guaranteed", cpu=1, memory="1Gi")
+        .with_volumes(volumes)
+        for name in ["main", "sidecar"]
+    ]
+    depl = fire.DeploymentBuilder(app_label="app").with_containers(*containers)
+    assert depl.qos_class == QoSClass.Guaranteed
+
+    chart = Chart(App(), "pkg", namespace="ns", disable_resource_name_hashes=True)
+    depl.build(chart)
+    pod_spec = next(o.to_json() for o in chart.api_objects if o.kind == "Deployment")["spec"]["template"]["spec"]
+    assert [c["resources"]["limits"]["memory"] for c in pod_spec["containers"]] == ["2Gi", "1Gi"]
+    assert [c["resources"]["requests"]["memory"] for c in pod_spec["containers"]] == ["2Gi", "1Gi"]
+
+
+def test_label_field_ref_env():
+    env = fire.EnvBuilder().with_field_ref("APP", DownwardAPIField.LABEL, "app")
+    assert fire.ContainerBuilder("c", "img").with_env(env).build().env == [
+        {"name": "APP", "valueFrom": {"fieldRef": {"fieldPath": "metadata.labels['app']"}}}
+    ]
+
+    with pytest.raises(ValueError):
+        fire.EnvBuilder().with_field_ref("LABELS", DownwardAPIField.LABEL)
+
+
+def test_runtime_tuning_env():
+    env = fire.EnvBuilder({"FOO": "bar"}).with_resource_field_ref("MEM_MB", ResourceField.LIMITS_MEMORY, "1Mi")
+    container = (
+        fire.ContainerBuilder("c", "img")
+        .with_env(env)
+        .with_resources(profile="guaranteed", cpu=2, memory="4Gi")
+        .with_gomaxprocs()
+        .with_jvm_heap_percentage(75)
+        .with_worker_pool_env("WORKERS", workers_per_cpu=4)
+    )
+    built = container.build()
+
+    assert built.env == [
+        {"name": "FOO", "value": "bar"},
+        {"name": "MEM_MB", "valueFrom": {"resourceFieldRef": {"resource": "limits.memory", "divisor": "1Mi"}}},
+        {"name": "GOMAXPROCS", "valueFrom": {"resourceFieldRef": {"resource": "limits.cpu", "divisor": "1"}}},
+        {"name": "JAVA_TOOL_OPTIONS", "value": "-XX:MaxRAMPercentage=75.0"},
+        {"name": "WORKERS", "valueFrom": {"resourceFieldRef": {"resource": "limits.cpu", "divisor": "250m"}}},
+    ]
+
+    with pytest.raises(ValueError):
+        fire.ContainerBuilder("c", "img").with_resources(requests={"cpu": 1}).with_gomaxprocs().build()
+
+
+def test_runtime_env_with_user_env():
+    env = fire.EnvBuilder({"JAVA_TOOL_OPTIONS": "-Xss1m", "FOO": "bar"})
+    container = (
+        fire.ContainerBuilder("c", "img")
+        .with_env(env)
+        .with_resources(profile="guaranteed", cpu=2, memory="4Gi")
+        .with_jvm_heap_percentage(75)
+    )
+
+    assert container.build().env == [
+        {"name": "FOO", "value": "bar"},
+        {"name": "JAVA_TOOL_OPTIONS", "value": "-Xss1m -XX:MaxRAMPercentage=75.0"},
+    ]
+
+    container = (
+        fire.ContainerBuilder("c", "img")
+        .with_env(fire.EnvBuilder({"GOMAXPROCS": "4"}))
+        .with_resources(profile="guaranteed", cpu=2, memory="4Gi")
+        .with_gomaxprocs()
+    )
+    with pytest.raises(ValueError):
+        container.build()
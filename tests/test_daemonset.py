@@ -0,0 +1,36 @@
+import pytest
+from cdk8s import App
+from cdk8s import Chart
+
+import fireconfig as fire
+from fireconfig.types import HostPathType
+from fireconfig.types import TaintEffect
+
+
+def _make_chart():
+    return Chart(App(), "pkg", namespace="ns", disable_resource_name_hashes=True)
+
+
+def test_daemonset():
+    chart = _make_chart()
+    volumes = fire.VolumesBuilder().with_host_path("logs", "/var/log", "/var/log", HostPathType.Directory)
+    ds = (
+        fire.DaemonSetBuilder(app_label="log-shipper")
+        .with_containers(fire.ContainerBuilder("c", "img").with_volumes(volumes))
+        .with_toleration("node-role.kubernetes.io/control-plane", effect=TaintEffect.NoSchedule)
+        .with_priority_class("system-node-critical")
+        .with_rolling_update(min_ready_seconds=10)
+    )
+    ds.build(chart)
+
+    spec = next(o.to_json() for o in chart.api_objects if o.kind == "DaemonSet")["spec"]
+    assert spec["updateStrategy"] == {"type": "RollingUpdate", "rollingUpdate": {"maxSurge": 1, "maxUnavailable": 0}}
+    assert spec["minReadySeconds"] == 10
+
+    pod_spec = spec["template"]["spec"]
+    assert pod_spec["priorityClassName"] == "system-node-critical"
+    assert pod_spec["volumes"] == [{"name": "logs", "hostPath": {"path": "/var/log", "type": "Directory"}}]
+    assert pod_spec["tolerations"][0]["effect"] == "NoSchedule"
+
+    with pytest.raises(ValueError):
+        fire.DaemonSetBuilder(app_label="foo").with_rolling_update(max_surge=0, max_unavailable=0)
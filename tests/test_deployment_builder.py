@@ -0,0 +1,283 @@
+import pytest
+from cdk8s import App
+from cdk8s import Chart
+
+import fireconfig as fire
+from fireconfig.types import QoSClass
+from fireconfig.types import RolloutPreset
+from fireconfig.types import ScalingPolicySelect
+from fireconfig.types import ScalingPolicyType
+from fireconfig.types import SelectorOperator
+from fireconfig.types import TopologyKey
+from fireconfig.types import TrafficPolicy
+from fireconfig.types import UnsatisfiableAction
+
+
+def _make_chart():
+    return Chart(App(), "pkg", namespace="ns", disable_resource_name_hashes=True)
+
+
+def _find(chart, kind):
+    return next(o.to_json() for o in chart.api_objects if o.kind == kind)
+
+
+def test_replica_range_builds_hpa():
+    chart = _make_chart()
+    autoscaler = (
+        fire.AutoscalerBuilder()
+        .with_cpu_utilization(70)
+        .with_memory_utilization(80)
+        .with_custom_metric("requests_per_second", "100")
+        .with_external_metric("queue_depth", value=30, selector={"queue": "work"})
+        .with_scale_down_behavior(
+            fire.ScalingPolicy(ScalingPolicyType.Percent, 10, 60),
+            stabilization_window_seconds=300,
+            select_policy=ScalingPolicySelect.Min,
+        )
+    )
+    depl = (
+        fire.DeploymentBuilder(app_label="app")
+        .with_containers(fire.ContainerBuilder("c", "img"))
+        .with_replicas(2, 10)
+        .with_autoscaler(autoscaler)
+        .build(chart)
+    )
+
+    assert "replicas" not in depl.to_json()["spec"]
+
+    hpa = _find(chart, "HorizontalPodAutoscaler")
+    assert hpa["apiVersion"] == "autoscaling/v2"
+    assert hpa["spec"]["scaleTargetRef"] == {"apiVersion": "apps/v1", "kind": "Deployment", "name": "pkg-depl"}
+    assert hpa["spec"]["minReplicas"] == 2 and hpa["spec"]["maxReplicas"] == 10
+    assert hpa["spec"]["metrics"][0] == {
+        "type": "Resource",
+        "resource": {"name": "cpu", "target": {"type": "Utilization", "averageUtilization": 70}},
+    }
+    assert hpa["spec"]["metrics"][2]["pods"]["target"] == {"type": "AverageValue", "averageValue": "100"}
+    assert hpa["spec"]["metrics"][3]["external"] == {
+        "metric": {"name": "queue_depth", "selector": {"matchLabels": {"queue": "work"}}},
+        "target": {"type": "Value", "value": 30},
+    }
+    assert hpa["spec"]["behavior"] == {
+        "scaleDown": {
+            "policies": [{"type": "Percent", "value": 10, "periodSeconds": 60}],
+            "selectPolicy": "Min",
+            "stabilizationWindowSeconds": 300,
+        }
+    }
+
+    assert "HorizontalPodAutoscaler" in {d.kind for d in depl.node.dependencies}
+
+
+def test_autoscaler_requires_replica_range():
+    with pytest.raises(ValueError):
+        fire.DeploymentBuilder(app_label="app").with_autoscaler(fire.AutoscalerBuilder()).build(_make_chart())
+
+
+def test_scheduling_constraints():
+    depl = (
+        fire.DeploymentBuilder(app_label="app")
+        .with_containers(fire.ContainerBuilder("c", "img"))
+        .with_topology_spread()
+        .with_topology_spread(TopologyKey.Hostname, when_unsatisfiable=UnsatisfiableAction.DoNotSchedule)
+        .with_pod_anti_affinity()
+        .with_pod_anti_affinity(TopologyKey.Zone, labels={"app.kubernetes.io/name": "noisy"}, weight=None)
+        .with_node_affinity("node.kubernetes.io/instance-type", ["c5.xlarge", "c5.2xlarge"])
+        .with_node_affinity("spot", operator=SelectorOperator.DoesNotExist, weight=50)
+        .build(_make_chart())
+    )
+    pod_spec = depl.to_json()["spec"]["template"]["spec"]
+
+    selector = {"matchLabels": {"app.kubernetes.io/name": "app"}}
+    assert pod_spec["topologySpreadConstraints"] == [
+        {
+            "maxSkew": 1,
+            "topologyKey": "topology.kubernetes.io/zone",
+            "whenUnsatisfiable": "ScheduleAnyway",
+            "labelSelector": selector,
+        },
+        {
+            "maxSkew": 1,
+            "topologyKey": "kubernetes.io/hostname",
+            "whenUnsatisfiable": "DoNotSchedule",
+            "labelSelector": selector,
+        },
+    ]
+    assert pod_spec["affinity"]["podAntiAffinity"] == {
+        "preferredDuringSchedulingIgnoredDuringExecution": [
+            {"podAffinityTerm": {"labelSelector": selector, "topologyKey": "kubernetes.io/hostname"}, "weight": 100}
+        ],
+        "requiredDuringSchedulingIgnoredDuringExecution": [
+            {
+                "labelSelector": {"matchLabels": {"app.kubernetes.io/name": "noisy"}},
+                "topologyKey": "topology.kubernetes.io/zone",
+            }
+        ],
+    }
+    assert pod_spec["affinity"]["nodeAffinity"] == {
+        "preferredDuringSchedulingIgnoredDuringExecution": [
+            {"preference": {"matchExpressions": [{"key": "spot", "operator": "DoesNotExist"}]}, "weight": 50}
+        ],
+        "requiredDuringSchedulingIgnoredDuringExecution": {
+            "nodeSelectorTerms": [
+                {
+                    "matchExpressions": [
+                        {
+                            "key": "node.kubernetes.io/instance-type",
+                            "operator": "In",
+                            "values": ["c5.xlarge", "c5.2xlarge"],
+                        }
+                    ]
+                }
+            ]
+        },
+    }
+
+
+@pytest.mark.parametrize(
+    "operator,values",
+    [
+        (SelectorOperator.In, None),
+        (SelectorOperator.NotIn, []),
+        (SelectorOperator.Gt, ["1", "2"]),
+        (SelectorOperator.Exists, ["foo"]),
+    ],
+)
+def test_invalid_node_affinity(operator, values):
+    with pytest.raises(ValueError):
+        fire.DeploymentBuilder(app_label="app").with_node_affinity("key", values, operator)
+
+
+@pytest.mark.parametrize(
+    "replicas,pdb_args,expected",
+    [
+        ((1,), {}, {"maxUnavailable": 1}),
+        ((8,), {}, {"maxUnavailable": 2}),
+        ((3, 10), {}, {"maxUnavailable": "25%"}),
+        ((8,), {"max_unavailable": "10%"}, {"maxUnavailable": "10%"}),
+    ],
+)
+def test_pod_disruption_budget(replicas, pdb_args, expected):
+    chart = _make_chart()
+    depl = (
+        fire.DeploymentBuilder(app_label="app")
+        .with_containers(fire.ContainerBuilder("c", "img"))
+        .with_replicas(*replicas)
+        .with_pod_disruption_budget(**pdb_args)
+        .build(chart)
+    )
+
+    pdb = _find(chart, "PodDisruptionBudget")
+    assert pdb["spec"] == {"selector": {"matchLabels": {"app.kubernetes.io/name": "app"}}, **expected}
+    assert "PodDisruptionBudget" in {d.kind for d in depl.node.dependencies}
+
+
+def test_rollout_preset():
+    depl = (
+        fire.DeploymentBuilder(app_label="app")
+        .with_containers(fire.ContainerBuilder("c", "img"))
+        .with_rollout(RolloutPreset.Conservative, min_ready_seconds=10)
+        .build(_make_chart())
+    )
+    spec = depl.to_json()["spec"]
+
+    assert spec["strategy"] == {"type": "RollingUpdate", "rollingUpdate": {"maxSurge": 1, "maxUnavailable": 0}}
+    assert spec["minReadySeconds"] == 10
+    assert spec["progressDeadlineSeconds"] == 900
+    assert spec["revisionHistoryLimit"] == 10
+
+
+def test_latency_critical_requires_guaranteed_qos():
+    guaranteed = fire.ContainerBuilder("c1", "img").with_resources(profile="guaranteed", cpu=2, memory="4Gi")
+    burstable = fire.ContainerBuilder("c2", "img").with_resources(requests={"cpu": 1})
+
+    depl = fire.DeploymentBuilder(app_label="app").with_containers(guaranteed).with_latency_critical()
+    depl.build(_make_chart())
+
+    depl = fire.DeploymentBuilder(app_label="app").with_containers(guaranteed, burstable).with_latency_critical()
+    assert depl.qos_class == QoSClass.Burstable
+    with pytest.raises(ValueError):
+        depl.build(_make_chart())
+
+
+def test_env_as_config_map():
+    chart = _make_chart()
+    env = (
+        fire.EnvBuilder({"LOG_LEVEL": "info", "REGION": "us-east-1"})
+        .with_secret("TOKEN", "creds", "token")
+        .as_config_map()
+    )
+    depl = fire.DeploymentBuilder(app_label="app").with_containers(
+        fire.ContainerBuilder("c1", "img").with_env(env),
+        fire.ContainerBuilder("c2", "img").with_env(env),
+    )
+    depl.build(chart)
+
+    cms = [o.to_json() for o in chart.api_objects if o.kind == "ConfigMap"]
+    assert len(cms) == 1
+    assert cms[0]["data"] == {"LOG_LEVEL": "info", "REGION": "us-east-1"}
+    assert cms[0]["immutable"] is True
+
+    for c in _find(chart, "Deployment")["spec"]["template"]["spec"]["containers"]:
+        assert c["envFrom"] == [{"configMapRef": {"name": cms[0]["metadata"]["name"]}}]
+        assert [e["name"] for e in c["env"]] == ["TOKEN", "POD_OWNER"]
+
+
+def test_env_as_config_map_keeps_precedence():
+    chart = _make_chart()
+    env = fire.EnvBuilder({"DB_HOST": "literal", "URL": "http://$(DB_HOST)"}).with_secrets_from("creds").as_config_map()
+    fire.DeploymentBuilder(app_label="app").with_containers(fire.ContainerBuilder("c", "img").with_env(env)).build(
+        chart
+    )
+
+    cm = _find(chart, "ConfigMap")
+    assert cm["data"] == {"DB_HOST": "literal"}
+
+    c = _find(chart, "Deployment")["spec"]["template"]["spec"]["containers"][0]
+    assert c["envFrom"] == [{"secretRef": {"name": "creds"}}, {"configMapRef": {"name": cm["metadata"]["name"]}}]
+    assert {"name": "URL", "value": "http://$(DB_HOST)"} in c["env"]
+
+
+def test_service_options():
+    chart = _make_chart()
+    depl = (
+        fire.DeploymentBuilder(app_label="app")
+        .with_containers(fire.ContainerBuilder("c", "img").with_ports(8080, 9090))
+        .with_service(
+            [fire.ServicePort(8080, "grpc", app_protocol="kubernetes.io/h2c"), 9090],
+            internal_traffic_policy=TrafficPolicy.Local,
+            session_affinity_seconds=600,
+        )
+    )
+    depl.build(chart)
+
+    svc = _find(chart, "Service")
+    assert svc["spec"]["ports"] == [
+        {"port": 8080, "name": "grpc", "appProtocol": "kubernetes.io/h2c", "targetPort": 8080},
+        {"port": 9090, "name": "port-9090", "targetPort": 9090},
+    ]
+    assert svc["spec"]["internalTrafficPolicy"] == "Local"
+    assert svc["spec"]["sessionAffinity"] == "ClientIP"
+    assert svc["spec"]["sessionAffinityConfig"] == {"clientIP": {"timeoutSeconds": 600}}
+
+    chart = _make_chart()
+    fire.DeploymentBuilder(app_label="app").with_containers(
+        fire.ContainerBuilder("c", "img").with_ports(8080)
+    ).with_service(topology_aware=True).build(chart)
+    svc = _find(chart, "Service")
+    assert svc["metadata"]["annotations"] == {"service.kubernetes.io/topology-mode": "Auto"}
+    assert "clusterIP" not in svc["spec"]
+
+    chart = _make_chart()
+    fire.DeploymentBuilder(app_label="app").with_containers(
+        fire.ContainerBuilder("c", "img").with_ports(8080)
+    ).with_service(headless=True).build(chart)
+    assert _find(chart, "Service")["spec"]["clusterIP"] == "None"
+    assert _find(chart, "Service")["spec"]["ports"] == [{"port": 8080, "targetPort": 8080}]
+
+    with pytest.raises(ValueError):
+        fire.DeploymentBuilder(app_label="app").with_service(headless=True, topology_aware=True)
+    with pytest.raises(ValueError):
+        fire.DeploymentBuilder(app_label="app").with_service(
+            topology_aware=True, internal_traffic_policy=TrafficPolicy.Local
+        )
@@ -0,0 +1,52 @@
+import simplejson as json
+
+from fireconfig.graph import ObjectGraph
+
+
+def _make_graph():
+    graph = ObjectGraph()
+    graph.add_node("global/ns", "Namespace", "global")
+    graph.add_node("ns/cm", "ConfigMap", "pkg")
+    graph.add_node("ns/sa", "ServiceAccount", "pkg")
+    graph.add_node("ns/depl", "Deployment", "pkg")
+    graph.add_node("ns/pdb", "PodDisruptionBudget", "pkg")
+    graph.add_node("ns/other", "ConfigMap", "pkg2")
+    graph.add_edge("ns/cm", "ns/depl")
+    graph.add_edge("ns/sa", "ns/depl")
+    graph.add_edge("ns/depl", "ns/pdb")
+    graph.add_chart_edge("global", "pkg")
+    graph.add_chart_edge("global", "pkg2")
+    return graph
+
+
+def test_dependency_queries():
+    graph = _make_graph()
+    assert graph.reverse_dependencies("ns/cm") == ["ns/depl"]
+    assert graph.dependencies("ns/depl") == ["ns/cm", "ns/sa"]
+    assert graph.reachable("ns/cm") == {"ns/depl", "ns/pdb"}
+    assert "ns/pdb" in graph.reachable("ns/sa")
+    assert not graph.reachable("ns/pdb")
+    assert graph.charts() == ["global", "pkg", "pkg2"]
+    assert graph.chart_edges() == [("global", "pkg"), ("global", "pkg2")]
+
+
+def test_blast_radius():
+    graph = _make_graph()
+    assert graph.blast_radius("ns/cm") == {"ns/depl", "ns/pdb"}
+    assert graph.blast_radius("global/ns") == {"ns/cm", "ns/sa", "ns/depl", "ns/pdb", "ns/other"}
+
+
+def test_exports():
+    graph = _make_graph()
+    parsed = json.loads(graph.to_json())
+    assert {"source": "ns/cm", "target": "ns/depl"} in parsed["edges"]
+    assert {"id": "ns/depl", "kind": "Deployment", "chart": "pkg"} in parsed["nodes"]
+    assert '"ns/cm" -> "ns/depl";' in graph.to_dot()
+    assert '<edge source="ns/cm" target="ns/depl"/>' in graph.to_graphml()
+
+
+def test_depth():
+    graph = _make_graph()
+    assert graph.depth("ns/cm") == 0
+    assert graph.depth("ns/depl") == 1
+    assert graph.depth("ns/pdb") == 2
@@ -0,0 +1,105 @@
+import pytest
+from cdk8s import App
+from cdk8s import Chart
+
+import fireconfig as fire
+from fireconfig.types import ConcurrencyPolicy
+from fireconfig.types import RestartPolicy
+
+
+def _make_chart():
+    return Chart(App(), "pkg", namespace="ns", disable_resource_name_hashes=True)
+
+
+def test_indexed_job():
+    chart = _make_chart()
+    job = (
+        fire.JobBuilder(app_label="batch")
+        .with_containers(fire.ContainerBuilder("c", "img"))
+        .with_parallelism(4)
+        .with_indexed_completions(16, backoff_limit_per_index=2, max_failed_indexes=3)
+        .with_ttl_seconds_after_finished(600)
+        .with_index_env()
+    )
+    job.build(chart)
+
+    spec = next(o.to_json() for o in chart.api_objects if o.kind == "Job")["spec"]
+    assert spec["parallelism"] == 4
+    assert spec["completions"] == 16
+    assert spec["completionMode"] == "Indexed"
+    assert spec["backoffLimitPerIndex"] == 2
+    assert spec["maxFailedIndexes"] == 3
+    assert spec["ttlSecondsAfterFinished"] == 600
+    assert spec["template"]["spec"]["restartPolicy"] == "Never"
+
+    env = spec["template"]["spec"]["containers"][0]["env"]
+    assert {
+        "name": "SHARD_INDEX",
+        "valueFrom": {"fieldRef": {"fieldPath": "metadata.annotations['batch.kubernetes.io/job-completion-index']"}},
+    } in env
+    assert {"name": "SHARD_COUNT", "value": "16"} in env
+    assert {"name": "POD_OWNER", "value": "pkg-job"} in env
+
+
+def test_parallelism_after_indexed_completions():
+    chart = _make_chart()
+    job = (
+        fire.JobBuilder(app_label="batch")
+        .with_containers(fire.ContainerBuilder("c", "img"))
+        .with_indexed_completions(16)
+        .with_parallelism(4)
+    )
+    job.build(chart)
+
+    spec = next(o.to_json() for o in chart.api_objects if o.kind == "Job")["spec"]
+    assert spec["parallelism"] == 4
+    assert spec["completions"] == 16
+    assert spec["completionMode"] == "Indexed"
+
+    with pytest.raises(ValueError):
+        fire.JobBuilder(app_label="batch").with_indexed_completions(16).with_parallelism(4, completions=8)
+
+
+def test_job_validation():
+    with pytest.raises(ValueError):
+        fire.JobBuilder(app_label="batch").with_restart_policy(RestartPolicy.Always)
+
+    with pytest.raises(ValueError):
+        fire.JobBuilder(app_label="batch").with_indexed_completions(4, max_failed_indexes=1)
+
+    job = (
+        fire.JobBuilder(app_label="batch")
+        .with_containers(fire.ContainerBuilder("c", "img"))
+        .with_indexed_completions(4, backoff_limit_per_index=1)
+        .with_restart_policy(RestartPolicy.OnFailure)
+    )
+    with pytest.raises(ValueError):
+        job.build(_make_chart())
+
+    job = fire.JobBuilder(app_label="batch").with_containers(fire.ContainerBuilder("c", "img")).with_index_env()
+    with pytest.raises(ValueError):
+        job.build(_make_chart())
+
+
+def test_cron_job():
+    chart = _make_chart()
+    cron_job = (
+        fire.CronJobBuilder(app_label="nightly", schedule="0 3 * * *")
+        .with_containers(fire.ContainerBuilder("c", "img"))
+        .with_concurrency_policy(ConcurrencyPolicy.Forbid)
+        .with_time_zone("Etc/UTC")
+        .with_indexed_completions(2, backoff_limit_per_index=1)
+        .with_index_env("WORKER", "WORKERS")
+    )
+    cron_job.build(chart)
+
+    spec = next(o.to_json() for o in chart.api_objects if o.kind == "CronJob")["spec"]
+    assert spec["schedule"] == "0 3 * * *"
+    assert spec["concurrencyPolicy"] == "Forbid"
+    assert spec["timeZone"] == "Etc/UTC"
+
+    job_spec = spec["jobTemplate"]["spec"]
+    assert job_spec["backoffLimitPerIndex"] == 1
+    env = job_spec["template"]["spec"]["containers"][0]["env"]
+    assert {"name": "WORKERS", "value": "2"} in env
+    assert {"name": "POD_OWNER", "value": "pkg-cronjob"} in env
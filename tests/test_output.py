@@ -0,0 +1,80 @@
+import io
+
+from cdk8s import App
+from cdk8s import Chart
+from cdk8s import DependencyVertex
+
+from fireconfig import k8s
+from fireconfig.output import format_diff
+from fireconfig.output import format_mermaid_graph
+from fireconfig.output import paginate_plan
+from fireconfig.output import write_diff
+from fireconfig.plan import ResourceChanges
+from fireconfig.subgraph import ChartSubgraph
+
+
+def _make_changes():
+    changes = ResourceChanges()
+    changes.update_state("values_changed", "root['spec']['replicas']", "Deployment")
+    changes.add_change("root['spec']['replicas']", 1, 3)
+    return {"ns/depl": changes}
+
+
+def test_write_diff_streams():
+    out = io.StringIO()
+    write_diff(out, _make_changes())
+
+    assert out.getvalue() == (
+        "<details><summary>\n\n#### ns/depl: Changed\n\n</summary>\n\n"
+        "```\nroot['spec']['replicas']:\n1 --> 3\n```\n\n"
+        "</details>\n"
+    )
+    assert format_diff(_make_changes()) == out.getvalue()
+
+
+def test_paginate_plan():
+    resource_changes = {}
+    for i in range(20):
+        changes = ResourceChanges()
+        changes.update_state("values_changed", "root['data']", "ConfigMap")
+        changes.add_change("root['data']", {"foo": "a" * 100}, {"foo": "b" * 100})
+        resource_changes[f"ns/cm-{i:02}"] = changes
+
+    big = ResourceChanges()
+    big.update_state("values_changed", "root['data']", "ConfigMap")
+    for i in range(50):
+        big.add_change(f"root['data']['key{i}']", "a" * 100, "b" * 100)
+    resource_changes["ns/zz-big"] = big
+
+    pages = paginate_plan(resource_changes, graph="```mermaid\n```\n\n", budget=2000)
+
+    assert len(pages) > 1
+    assert pages[0].startswith(f"### Plan (page 1 of {len(pages)})")
+    assert "### Summary" in pages[0] and "| Changed | 21 |" in pages[0]
+    assert "```mermaid" in pages[0]
+    for page in pages:
+        assert len(page.encode("utf-8")) <= 2000
+        assert page.count("<details>") == page.count("</details>")
+    assert "ns/zz-big: Changed (truncated)" in pages[-1]
+    assert "more change(s) omitted" in pages[-1]
+    assert sum(page.count("<details>") for page in pages) == 21
+
+
+def test_mermaid_changed_neighborhood():
+    chart = Chart(App(), "pkg", namespace="ns", disable_resource_name_hashes=True)
+    vertices = [DependencyVertex(k8s.KubeConfigMap(chart, f"cm{i}")) for i in range(6)]
+    sg = ChartSubgraph("pkg")
+    for s, e in zip(vertices, vertices[1:]):
+        sg.add_edge(s, e)
+
+    changes = ResourceChanges()
+    changes.update_state("values_changed", "root['data']", "ConfigMap")
+
+    graph = format_mermaid_graph({}, {"pkg": sg}, None, {"ns/pkg-cm2": changes}, neighborhood_hops=1)
+
+    assert "ns/pkg-cm1[" in graph and "ns/pkg-cm2[" in graph and "ns/pkg-cm3[" in graph
+    assert "ns/pkg-cm0[" not in graph and "ns/pkg-cm5[" not in graph
+    assert "pkg/__unchanged__[<i>3 unchanged object(s)</i>]" in graph
+    assert "pkg/__unchanged__--->ns/pkg-cm1" in graph
+    assert "ns/pkg-cm3--->pkg/__unchanged__" in graph
+    assert "style ns/pkg-cm2 fill:" in graph
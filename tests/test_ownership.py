@@ -0,0 +1,39 @@
+from fireconfig.ownership import OwnedFields
+
+
+def _make_depl():
+    return {
+        "kind": "Deployment",
+        "metadata": {"name": "depl", "annotations": {"a/b": "c"}},
+        "spec": {
+            "replicas": 3,
+            "template": {
+                "spec": {
+                    "containers": [
+                        {"name": "c1", "resources": {"requests": {"cpu": 1}}},
+                        {"name": "c2", "resources": {"requests": {"cpu": 2}}},
+                    ]
+                }
+            },
+        },
+    }
+
+
+def test_prune_kind_fields():
+    owned = OwnedFields().with_hpa_replicas().with_vpa_resources()
+    depl = _make_depl()
+    owned.prune("ns/depl", depl)
+
+    assert "replicas" not in depl["spec"]
+    assert depl["spec"]["template"]["spec"]["containers"] == [{"name": "c1"}, {"name": "c2"}]
+
+
+def test_prune_object_fields():
+    owned = OwnedFields().with_object_field("ns/depl", "/metadata/annotations/a~1b")
+    depl = _make_depl()
+    owned.prune("ns/other", depl)
+    assert depl == _make_depl()
+
+    owned.prune("ns/depl", depl)
+    assert depl["metadata"]["annotations"] == {}
+    assert depl["spec"]["replicas"] == 3
@@ -0,0 +1,111 @@
+import simplejson as json
+from cdk8s import App
+from cdk8s import Chart
+from deepdiff.helper import notpresent  # type: ignore
+
+import fireconfig as fire
+from fireconfig.graph import ObjectGraph
+from fireconfig.output import format_diff
+from fireconfig.plan import ResourceChanges
+from fireconfig.plan import ResourceState
+from fireconfig.plan import add_config_map_sizes
+from fireconfig.plan import add_rollout_estimates
+from fireconfig.plan import build_plan
+
+
+def test_build_plan():
+    graph = ObjectGraph()
+    graph.add_node("ns/cm", "ConfigMap", "pkg")
+    graph.add_node("ns/depl", "Deployment", "pkg")
+    graph.add_edge("ns/cm", "ns/depl")
+
+    changed = ResourceChanges()
+    changed.update_state("values_changed", "root['spec']['template']['spec']['containers'][0]['image']", "Deployment")
+    changed.add_change("root['spec']['template']['spec']['containers'][0]['image']", "foo:1", "foo:2")
+    removed = ResourceChanges()
+    removed.update_state("dictionary_item_removed", "root", "Service")
+    removed.add_change("root", {"kind": "Service"}, notpresent)
+
+    plan = build_plan(graph, {"ns/depl": changed, "ns/svc": removed}, {"ns/svc": "Service"})
+    parsed = json.loads(plan.to_json())
+
+    assert [r["owned_name"] for r in parsed["resources"]] == ["ns/cm", "ns/depl", "ns/svc"]
+    assert [r.owned_name for r in plan.changed()] == ["ns/depl", "ns/svc"]
+
+    depl = parsed["resources"][1]
+    assert depl["state"] == "ChangedWithPodRecreate"
+    assert depl["dependencies"] == ["ns/cm"]
+    assert depl["depth"] == 1
+    assert depl["changes"] == [
+        {
+            "path": ["spec", "template", "spec", "containers", 0, "image"],
+            "old": "foo:1",
+            "new": "foo:2",
+            "old_present": True,
+            "new_present": True,
+        }
+    ]
+
+    svc = parsed["resources"][2]
+    assert svc["kind"] == "Service" and svc["chart"] is None and svc["state"] == "Removed"
+    assert svc["changes"][0]["new_present"] is False
+
+
+def test_add_rollout_estimates():
+    app = App()
+    chart = Chart(app, "pkg", namespace="ns", disable_resource_name_hashes=True)
+    fire.DeploymentBuilder(app_label="app").with_containers(fire.ContainerBuilder("c", "img")).with_replicas(
+        4, 10
+    ).build(chart)
+
+    changes = ResourceChanges()
+    changes.update_state("values_changed", "root['spec']['template']['spec']['containers'][0]['image']", "Deployment")
+    resource_changes = {"ns/pkg-depl": changes}
+    add_rollout_estimates(app, resource_changes)
+
+    # HPA minimum of 4 replicas, default 25%/25% strategy -> 2 batches
+    assert changes.rollout_seconds == 10
+    assert "_Estimated rollout time: 10s_" in format_diff(resource_changes)
+
+
+def test_add_config_map_sizes():
+    app = App()
+    chart = Chart(app, "pkg", namespace="ns", disable_resource_name_hashes=True)
+    fire.VolumesBuilder().with_config_map("cfg", "/config", {"a.yml": "x" * 2048}).build_volumes(chart)
+
+    changes = ResourceChanges()
+    changes.update_state("dictionary_item_added", "root", "ConfigMap")
+    resource_changes = {"ns/pkg-cfg": changes}
+    add_config_map_sizes(app, resource_changes)
+
+    assert changes.size_bytes == 2048
+    assert "_Size: 2.0KiB of 1.0MiB limit_" in format_diff(resource_changes)
+
+
+def test_immutable_field_change_replaces():
+    changes = ResourceChanges()
+    changes.update_state("values_changed", "root['spec']['template']['spec']['containers'][0]['image']", "StatefulSet")
+    changes.update_state(
+        "values_changed",
+        "root['spec']['volumeClaimTemplates'][0]['spec']['resources']['requests']['storage']",
+        "StatefulSet",
+    )
+    changes.update_state("values_changed", "root['spec']['replicas']", "StatefulSet")
+    assert changes.state == ResourceState.Replaced
+
+    for path in [
+        "root['spec']['podManagementPolicy']",
+        "root['spec']['serviceName']",
+        "root['spec']['selector']['matchLabels']['app']",
+    ]:
+        changes = ResourceChanges()
+        changes.update_state("values_changed", path, "StatefulSet")
+        assert changes.state == ResourceState.Replaced
+
+    changes = ResourceChanges()
+    changes.update_state("values_changed", "root['spec']['template']['spec']['containers'][0]['image']", "Job")
+    assert changes.state == ResourceState.Replaced
+
+    changes = ResourceChanges()
+    changes.update_state("values_changed", "root['spec']['volumeClaimTemplates'][0]['metadata']['name']", "Deployment")
+    assert changes.state == ResourceState.Changed
@@ -0,0 +1,33 @@
+from decimal import Decimal
+
+import pytest
+
+from fireconfig.resources import quantity_value
+
+
+@pytest.mark.parametrize(
+    "quantity,expected",
+    [
+        (2, Decimal(2)),
+        ("500m", Decimal("0.5")),
+        ("1.5", Decimal("1.5")),
+        (".5Gi", Decimal(2**29)),
+        ("8Gi", Decimal(8 * 2**30)),
+        ("1e3", Decimal(1000)),
+        ("1E-3", Decimal("0.001")),
+        ("+2.5e+2", Decimal(250)),
+        ("1E", Decimal(10**18)),
+        ("3P", Decimal(3 * 10**15)),
+        ("1Pi", Decimal(2**50)),
+        ("2Ei", Decimal(2**61)),
+        ("100n", Decimal("1e-7")),
+    ],
+)
+def test_quantity_value(quantity, expected):
+    assert quantity_value(quantity) == expected
+
+
+@pytest.mark.parametrize("quantity", ["", "Gi", "1e", "1Xi", "1.2.3", "1 Gi"])
+def test_invalid_quantity_value(quantity):
+    with pytest.raises(ValueError):
+        quantity_value(quantity)
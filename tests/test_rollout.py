@@ -0,0 +1,35 @@
+from fireconfig.rollout import estimate_rollout_seconds
+from fireconfig.rollout import format_duration
+
+
+def _make_depl(replicas, strategy=None, min_ready_seconds=None, readiness_probe=None):
+    spec = {"replicas": replicas, "template": {"spec": {"containers": [{"name": "c"}]}}}
+    if strategy is not None:
+        spec["strategy"] = {"type": "RollingUpdate", "rollingUpdate": strategy}
+    if min_ready_seconds is not None:
+        spec["minReadySeconds"] = min_ready_seconds
+    if readiness_probe is not None:
+        spec["template"]["spec"]["containers"][0]["readinessProbe"] = readiness_probe
+    return {"kind": "Deployment", "spec": spec}
+
+
+def test_estimate_rollout_seconds():
+    # defaults: 25% surge (rounded up) + 25% unavailable (rounded down) = 5 pods per batch
+    assert estimate_rollout_seconds(_make_depl(10)) == 2 * 5
+
+    # one at a time, 30s min ready, probe passes after 10s + 2 * 5s
+    one_at_a_time = _make_depl(
+        10,
+        strategy={"maxSurge": 1, "maxUnavailable": 0},
+        min_ready_seconds=30,
+        readiness_probe={"initialDelaySeconds": 10, "periodSeconds": 5, "successThreshold": 2},
+    )
+    assert estimate_rollout_seconds(one_at_a_time) == 10 * (5 + 20 + 30)
+
+    assert estimate_rollout_seconds(_make_depl(10, strategy={"maxSurge": "100%", "maxUnavailable": 0})) == 5
+    assert estimate_rollout_seconds(_make_depl(1), replicas=4) == 2 * 5
+
+
+def test_format_duration():
+    assert format_duration(45) == "45s"
+    assert format_duration(125) == "2m05s"
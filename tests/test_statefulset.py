@@ -0,0 +1,81 @@
+import pytest
+from cdk8s import App
+from cdk8s import Chart
+
+import fireconfig as fire
+from fireconfig.types import PodManagementPolicy
+
+
+def _make_chart():
+    return Chart(App(), "pkg", namespace="ns", disable_resource_name_hashes=True)
+
+
+def _find(chart, kind):
+    return next(o.to_json() for o in chart.api_objects if o.kind == kind)
+
+
+def test_statefulset():
+    chart = _make_chart()
+    volumes = (
+        fire.VolumesBuilder()
+        .with_config_map("cfg", "/config", {"cache.yml": "foo"})
+        .with_persistent_claim("data", "/data", "100Gi", storage_class="fast-ssd")
+    )
+    sts = (
+        fire.StatefulSetBuilder(app_label="cache")
+        .with_containers(fire.ContainerBuilder("c", "img").with_ports(6379).with_volumes(volumes))
+        .with_replicas(120)
+        .with_pod_management_policy(PodManagementPolicy.Parallel)
+        .with_rolling_update(partition=100)
+        .with_service_account_and_role_binding("cache-role")
+    )
+    obj = sts.build(chart)
+
+    spec = _find(chart, "StatefulSet")["spec"]
+    assert spec["replicas"] == 120
+    assert spec["podManagementPolicy"] == "Parallel"
+    assert spec["updateStrategy"] == {"type": "RollingUpdate", "rollingUpdate": {"partition": 100}}
+    assert spec["serviceName"] == "cache-headless"
+    assert spec["volumeClaimTemplates"] == [
+        {
+            "metadata": {"name": "data"},
+            "spec": {
+                "accessModes": ["ReadWriteOnce"],
+                "resources": {"requests": {"storage": "100Gi"}},
+                "storageClassName": "fast-ssd",
+            },
+        }
+    ]
+
+    pod_spec = spec["template"]["spec"]
+    assert pod_spec["serviceAccountName"] == "pkg-sa"
+    assert [v["name"] for v in pod_spec["volumes"]] == ["cfg"]
+    assert {m["name"] for m in pod_spec["containers"][0]["volumeMounts"]} == {"cfg", "data"}
+
+    headless = _find(chart, "Service")
+    assert headless["spec"]["clusterIP"] == "None"
+    assert headless["spec"]["ports"] == [{"port": 6379, "targetPort": 6379}]
+    assert {d.kind for d in obj.node.dependencies} == {"ConfigMap", "Service", "ServiceAccount", "RoleBinding"}
+
+
+def test_persistent_claim_needs_statefulset():
+    volumes = fire.VolumesBuilder().with_persistent_claim("data", "/data", "1Gi")
+    depl = fire.DeploymentBuilder(app_label="app").with_containers(
+        fire.ContainerBuilder("c", "img").with_volumes(volumes)
+    )
+
+    with pytest.raises(ValueError):
+        depl.build(_make_chart())
+
+
+def test_statefulset_rejects_second_headless_service():
+    sts = fire.StatefulSetBuilder(app_label="cache")
+
+    with pytest.raises(ValueError):
+        sts.with_service(headless=True)
+
+    chart = _make_chart()
+    sts.with_containers(fire.ContainerBuilder("c", "img").with_ports(6379)).with_service().build(chart)
+    services = {o.to_json()["metadata"]["name"]: o.to_json()["spec"] for o in chart.api_objects if o.kind == "Service"}
+    assert services["cache-headless"]["clusterIP"] == "None"
+    assert "clusterIP" not in services[next(n for n in services if n != "cache-headless")]
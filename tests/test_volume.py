@@ -0,0 +1,217 @@
+import base64
+import gzip
+import sys
+
+import pytest
+from cdk8s import App
+from cdk8s import Chart
+
+import fireconfig as fire
+from fireconfig.configmap import MAX_CONFIG_MAP_BYTES
+from fireconfig.configmap import binary_size_delta
+from fireconfig.configmap import shard_data
+from fireconfig.configmap import summarize_binary_data
+from fireconfig.types import Compression
+from fireconfig.types import DownwardAPIField
+from fireconfig.util import content_hash
+
+
+def _make_chart() -> Chart:
+    return Chart(App(), "chart", namespace="ns", disable_resource_name_hashes=True)
+
+
+def _config_map_name(data, immutable):
+    volumes = fire.VolumesBuilder().with_config_map("cfg", "/config", data, immutable=immutable)
+    defn, (cm,) = volumes.build_volumes(_make_chart())["cfg"]
+    assert defn["configMap"]["name"] == cm.name
+    return cm
+
+
+def test_mutable_config_map():
+    cm = _config_map_name({"foo.yml": "bar"}, immutable=False)
+
+    assert cm.name == "chart-cfg"
+    assert "immutable" not in cm.to_json()
+
+
+def test_immutable_config_map():
+    cm = _config_map_name({"foo.yml": "bar", "baz.yml": "qux"}, immutable=True)
+
+    assert cm.name.startswith("chart-cfg-")
+    assert cm.to_json()["immutable"] is True
+
+    # the name only depends on the content
+    assert _config_map_name({"baz.yml": "qux", "foo.yml": "bar"}, immutable=True).name == cm.name
+    assert _config_map_name({"foo.yml": "bar", "baz.yml": "changed"}, immutable=True).name != cm.name
+
+
+def test_shared_config_map_pool():
+    app = App()
+    gl = Chart(app, "global", disable_resource_name_hashes=True)
+    charts = [Chart(app, f"pkg{i}", namespace="ns", disable_resource_name_hashes=True) for i in range(2)]
+    other_ns = Chart(app, "pkg2", namespace="other", disable_resource_name_hashes=True)
+
+    data = {"shared.yml": "foo"}
+    cms = [
+        fire.VolumesBuilder().with_config_map("cfg", "/config", data, shared=True).build_volumes(c)["cfg"][1][0]
+        for c in [*charts, other_ns]
+    ]
+
+    assert cms[0] is cms[1]
+    assert cms[0] is not cms[2]
+    assert cms[0].chart is gl
+    assert cms[0].metadata.namespace == "ns"
+    assert cms[2].metadata.namespace == "other"
+    assert cms[0].name == cms[2].name
+    assert cms[0].to_json()["immutable"] is True
+
+
+def test_shard_data():
+    data = {"a": "x" * 600, "b": "y" * 500, "c": "z" * 300, "d": "w" * 100}
+
+    assert shard_data(data, max_bytes=1500) == [data]
+    assert shard_data(data, max_bytes=1000) == [{"a": data["a"], "c": data["c"], "d": data["d"]}, {"b": data["b"]}]
+    with pytest.raises(ValueError):
+        shard_data(data, max_bytes=550)
+
+
+def test_oversized_config_map_is_projected():
+    big = "x" * (MAX_CONFIG_MAP_BYTES // 2 + 1)
+    data = {"a.bin": big, "b.bin": big, "c.yml": "foo"}
+    defn, cms = fire.VolumesBuilder().with_config_map("cfg", "/config", data).build_volumes(_make_chart())["cfg"]
+
+    assert [cm.name for cm in cms] == ["chart-cfg-0", "chart-cfg-1"]
+    assert defn["projected"]["sources"] == [
+        {
+            "configMap": {
+                "name": "chart-cfg-0",
+                "items": [{"key": "a.bin", "path": "a.bin"}, {"key": "c.yml", "path": "c.yml"}],
+            }
+        },
+        {"configMap": {"name": "chart-cfg-1", "items": [{"key": "b.bin", "path": "b.bin"}]}},
+    ]
+
+
+def test_binary_config_map():
+    data = {"model.bin": bytes(range(256)) * 16}
+    volumes = (
+        fire.VolumesBuilder()
+        .with_binary_config_map("raw", "/raw", data)
+        .with_binary_config_map("packed", "/packed", data, compression=Compression.Gzip)
+    )
+    vols = volumes.build_volumes(_make_chart())
+
+    raw = vols["raw"][1][0].to_json()
+    assert "data" not in raw
+    assert base64.b64decode(raw["binaryData"]["model.bin"]) == data["model.bin"]
+
+    packed = vols["packed"][1][0].to_json()
+    assert gzip.decompress(base64.b64decode(packed["binaryData"]["model.bin.gz"])) == data["model.bin"]
+    assert volumes.get_path_to_config_map("packed", "model.bin.gz") == "/packed/model.bin.gz"
+
+
+def test_shared_text_and_binary_config_maps_differ():
+    chart = _make_chart()
+    volumes = (
+        fire.VolumesBuilder()
+        .with_config_map("text", "/text", {"k": "AAEC"}, shared=True)
+        .with_binary_config_map("binary", "/binary", {"k": b"\x00\x01\x02"}, shared=True)
+    )
+    vols = volumes.build_volumes(chart)
+
+    text, binary = vols["text"][1][0], vols["binary"][1][0]
+    assert text.name != binary.name
+    assert text.to_json()["data"] == {"k": "AAEC"}
+    assert binary.to_json()["binaryData"] == {"k": "AAEC"}
+
+
+def test_zstd_binary_config_map():
+    zstandard = pytest.importorskip("zstandard")
+    data = {"model.bin": bytes(range(256)) * 16}
+    chart = _make_chart()
+    volumes = (
+        fire.VolumesBuilder()
+        .with_binary_config_map("a", "/a", data, compression=Compression.Zstd, shared=True)
+        .with_binary_config_map("b", "/b", data, compression=Compression.Zstd, shared=True)
+    )
+    vols = volumes.build_volumes(chart)
+
+    # the compressed output is deterministic, so both volumes get the same pooled ConfigMap
+    assert vols["a"][1] == vols["b"][1]
+    cm = vols["a"][1][0].to_json()
+    assert cm["immutable"] is True
+    packed = base64.b64decode(cm["binaryData"]["model.bin.zst"])
+    assert zstandard.ZstdDecompressor().decompress(packed) == data["model.bin"]
+
+
+def test_zstd_requires_zstandard(monkeypatch):
+    monkeypatch.setitem(sys.modules, "zstandard", None)
+    with pytest.raises(ImportError, match="fireconfig\\[zstd\\]"):
+        fire.VolumesBuilder().with_binary_config_map("a", "/a", {"x": b"x"}, compression=Compression.Zstd)
+
+
+def test_summarize_binary_data():
+    old = {"binaryData": {"a.bin": base64.b64encode(b"x" * 10).decode()}}
+    new = {"binaryData": {"a.bin": base64.b64encode(b"y" * 25).decode()}}
+    summarize_binary_data(old)
+    summarize_binary_data(new)
+
+    assert old["binaryData"]["a.bin"].startswith("<binary data: 10 bytes, sha256 ")
+    assert binary_size_delta(old["binaryData"]["a.bin"], new["binaryData"]["a.bin"]) == 15
+    assert binary_size_delta("foo", new["binaryData"]["a.bin"]) is None
+
+
+def test_projected_volume():
+    projected = (
+        fire.ProjectedVolumeBuilder(default_mode=0o440)
+        .with_config_map({"app.yml": "foo"})
+        .with_config_map({"log.yml": "bar"}, subdir="logging", immutable=True)
+        .with_secret("creds", keys=["token"], subdir="secrets")
+        .with_field_ref("app", DownwardAPIField.LABEL, "app")
+        .with_field_ref("annotations", DownwardAPIField.ANNOTATION)
+        .with_service_account_token("sa-token", audience="vault", expiration_seconds=600)
+    )
+    volumes = fire.VolumesBuilder().with_projected("config", "/config", projected)
+    defn, cms = volumes.build_volumes(_make_chart())["config"]
+
+    assert cms[0].name == f"chart-config-{content_hash(['app.yml'])}"
+    assert cms[1].name.startswith("chart-config-logging-")
+    assert defn == {
+        "name": "config",
+        "projected": {
+            "defaultMode": 0o440,
+            "sources": [
+                {"configMap": {"name": cms[0].name, "items": [{"key": "app.yml", "path": "app.yml"}]}},
+                {"configMap": {"name": cms[1].name, "items": [{"key": "log.yml", "path": "logging/log.yml"}]}},
+                {"secret": {"name": "creds", "items": [{"key": "token", "path": "secrets/token"}]}},
+                {"downwardAPI": {"items": [{"path": "app", "fieldRef": {"fieldPath": "metadata.labels['app']"}}]}},
+                {
+                    "downwardAPI": {
+                        "items": [{"path": "annotations", "fieldRef": {"fieldPath": "metadata.annotations"}}]
+                    }
+                },
+                {"serviceAccountToken": {"path": "sa-token", "audience": "vault", "expirationSeconds": 600}},
+            ],
+        },
+    }
+    assert volumes.build_mounts() == [{"name": "config", "mountPath": "/config"}]
+
+    with pytest.raises(ValueError):
+        fire.ProjectedVolumeBuilder().with_field_ref("ip", DownwardAPIField.POD_IP)
+
+
+def test_projected_config_map_names_are_stable():
+    def build(*extra):
+        projected = fire.ProjectedVolumeBuilder()
+        for data, subdir in extra:
+            projected.with_config_map(data, subdir=subdir)
+        projected.with_config_map({"app.yml": "foo"}).with_config_map({"log.yml": "bar"}, subdir="logging")
+        _, cms = (
+            fire.VolumesBuilder().with_projected("config", "/config", projected).build_volumes(_make_chart())["config"]
+        )
+        return [cm.name for cm in cms]
+
+    assert build()[-2:] == build(({"new.yml": "baz"}, "new"))[-2:]
+
+    with pytest.raises(ValueError):
+        fire.ProjectedVolumeBuilder().with_config_map({"a": "1"}, subdir="x").with_config_map({"b": "2"}, subdir="x")